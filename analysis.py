@@ -0,0 +1,247 @@
+import os
+import re
+import math
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from groq import Groq, AsyncGroq
+from dotenv import load_dotenv
+from comparison import (
+    PRICE_COLUMN, STOCK_COLUMN, best_row, comparison_frame, key_columns, result_rows, value_column
+)
+from embedding_cache import normalize_text
+from tracing import metrics, record_span, span
+
+load_dotenv()
+groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+async_groq_client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+ANALYSIS_MODEL = "llama-3.1-8b-instant"
+
+# Results up to this size are rendered as a comparison table without an LLM call
+ANALYSIS_FAST_PATH = os.getenv("ANALYSIS_FAST_PATH", "1") == "1"
+FAST_PATH_MAX_ROWS = int(os.getenv("FAST_PATH_MAX_ROWS", "10"))
+FAST_PATH_MAX_COLUMNS = int(os.getenv("FAST_PATH_MAX_COLUMNS", "6"))
+ANALYSIS_CACHE_TTL_S = float(os.getenv("ANALYSIS_CACHE_TTL_S", "3600"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "1024"))
+
+HIGHEST_WORDS = re.compile(r"\b(highest|most|max\w*|top|largest|biggest|expensive|best)\b", re.IGNORECASE)
+
+
+class AnalysisCache:
+    """LRU of Groq summaries keyed by a hash of the question and the results it summarised"""
+
+    def __init__(self, ttl: float = ANALYSIS_CACHE_TTL_S, max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(query: str, responses: list) -> str:
+        parts = [normalize_text(query)] + [
+            f"{result['db']}\0{result['status']}\0{result['output']}" for result in responses
+        ]
+        return hashlib.sha256("\0\0".join(parts).encode()).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[1]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, analysis: str):
+        with self._lock:
+            self._entries[key] = (analysis, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0, "entries": len(self._entries)}
+
+
+analysis_cache = AnalysisCache()
+
+
+def _cell(value) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, (float, Decimal)):
+        return f"{float(value):,.2f}"
+    return str(value).replace("|", "\\|")
+
+
+def _platform(db_name: str) -> str:
+    return db_name.replace("_", " ").title()
+
+
+def _highlight(frame, pattern, label: str, highest: bool):
+    """One-line 'cheapest/most available' callout for the first numeric column matching ``pattern``"""
+    column = value_column(frame, pattern)
+    row = best_row(frame, column, highest) if column is not None else None
+    if row is None:
+        return None
+    keys = key_columns(frame.columns)
+    what = f"{row[keys[0]]} on " if keys and row[keys[0]] is not None else ""
+    return f"**{label}:** {what}{_platform(row['platform'])} ({column} {_cell(row[column])})"
+
+
+def render_comparison(query: str, responses: list):
+    """Markdown comparison table and highlights for small tabular results, or None.
+
+    Returns None when any successful result is free text, large or
+    truncated, so the caller falls back to the LLM summary.
+    """
+    ok = [result for result in responses if result.get("status") == "ok"]
+    named = next((result["columns"] for result in ok if result.get("columns")), None)
+    for result in ok:
+        parsed = result_rows(result, named)
+        if (parsed is None or result.get("truncated") or len(parsed[1]) > FAST_PATH_MAX_ROWS
+                or len(parsed[0]) > FAST_PATH_MAX_COLUMNS):
+            return None
+    frame = comparison_frame(ok)
+    if frame is None:
+        return None
+
+    columns = [column for column in frame.columns if column not in ("platform", "match_key")]
+    lines = ["| Platform | " + " | ".join(columns) + " |", "|" + " --- |" * (len(columns) + 1)]
+    for row in frame.to_dict("records"):
+        lines.append(f"| {_platform(row['platform'])} | " + " | ".join(_cell(row[c]) for c in columns) + " |")
+    if frame.empty:
+        lines.append("| (no rows) |" + " |" * len(columns))
+
+    highest = bool(HIGHEST_WORDS.search(query))
+    notes = [
+        _highlight(frame, PRICE_COLUMN, "Most expensive" if highest else "Cheapest", highest),
+        _highlight(frame, STOCK_COLUMN, "Most available", True),
+    ]
+    notes += [f"_{_platform(result['db'])}: {result['status']}_" for result in responses if result not in ok]
+    notes = [note for note in notes if note]
+    return "\n".join(lines) + ("\n\n" + "  \n".join(notes) if notes else "")
+
+def _analysis_prompt(query: str, responses: list) -> str:
+    response_text = f"Query: {query}\n\nResults:\n"
+    for result in responses:
+        response_text += f"\n--- {result['db'].upper()} ({result['status']}) ---\n{result['output']}\n"
+
+    return f"""
+        Analyze this quick commerce data query: "{query}"
+
+        Database Results:
+        {response_text}
+
+        Provide:
+        1. Clear summary of findings
+        2. Key insights and comparisons
+        3. Actionable recommendations
+        4. Most relevant information
+
+        Keep it concise and user-friendly.
+        The output should be in markdown format within 3 lines.
+        """
+
+def _local_analysis(query: str, responses: list, key: str):
+    """Fast-path table or cached summary, recording which path answered"""
+    if ANALYSIS_FAST_PATH:
+        started = time.perf_counter()
+        try:
+            rendered = render_comparison(query, responses)
+        except Exception as e:
+            # An unexpected result shape must not cost the answer; Groq can still analyze it
+            print(f"Local comparison failed, falling back to Groq: {e}")
+            rendered = None
+        if rendered is not None:
+            record_span("analysis_fast_path", time.time(), time.perf_counter() - started)
+            metrics.inc("sql_agents_analysis_total", path="fast")
+            return rendered
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        metrics.inc("sql_agents_analysis_total", path="cache")
+        return cached
+    metrics.inc("sql_agents_analysis_total", path="llm")
+    return None
+
+def stream_analysis_with_groq(query: str, responses: list):
+    """Analyze multi-DB responses, yielding the answer token by token.
+
+    Small tabular results are rendered locally and repeated questions over
+    the same results are served from ``analysis_cache``; only the rest go
+    to Groq.
+    """
+    key = analysis_cache.make_key(query, responses)
+    local = _local_analysis(query, responses, key)
+    if local is not None:
+        yield local
+        return
+
+    # Timed by hand: a span() held open across yields would leak into the caller's context
+    wall_start, started = time.time(), time.perf_counter()
+    first_token_ms, status, usage = None, "ok", None
+    parts = []
+    try:
+        stream = groq_client.chat.completions.create(
+            messages=[{"role": "user", "content": _analysis_prompt(query, responses)}],
+            model=ANALYSIS_MODEL,
+            temperature=0.1,
+            stream=True
+        )
+        for chunk in stream:
+            # Groq reports token usage on the last chunk
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token_ms is None:
+                    first_token_ms = round((time.perf_counter() - started) * 1000, 3)
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+        analysis_cache.put(key, "".join(parts))
+
+    except Exception as e:
+        status = "error"
+        yield f"Analysis failed: {e}\n\nRaw Results:\n{responses}"
+    finally:
+        tokens = {}
+        if usage is not None:
+            tokens = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+            metrics.inc("sql_agents_groq_tokens_total", usage.prompt_tokens, type="prompt")
+            metrics.inc("sql_agents_groq_tokens_total", usage.completion_tokens, type="completion")
+        record_span("groq_analysis", wall_start, time.perf_counter() - started, status=status,
+                    model=ANALYSIS_MODEL, first_token_ms=first_token_ms, **tokens)
+
+def analyze_with_groq(query: str, responses: list) -> str:
+    """Analyze multi-DB responses using Groq"""
+    return "".join(stream_analysis_with_groq(query, responses))
+
+async def aanalyze_with_groq(query: str, responses: list) -> str:
+    """Analyze multi-DB responses using the async Groq client, with the same fast path and cache"""
+    key = analysis_cache.make_key(query, responses)
+    local = _local_analysis(query, responses, key)
+    if local is not None:
+        return local
+    try:
+        with span("groq_analysis", model=ANALYSIS_MODEL) as current:
+            completion = await async_groq_client.chat.completions.create(
+                messages=[{"role": "user", "content": _analysis_prompt(query, responses)}],
+                model=ANALYSIS_MODEL,
+                temperature=0.1
+            )
+            usage = getattr(completion, "usage", None)
+            if usage is not None:
+                current.update(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+                metrics.inc("sql_agents_groq_tokens_total", usage.prompt_tokens, type="prompt")
+                metrics.inc("sql_agents_groq_tokens_total", usage.completion_tokens, type="completion")
+        analysis_cache.put(key, completion.choices[0].message.content)
+        return completion.choices[0].message.content
+
+    except Exception as e:
+        return f"Analysis failed: {e}\n\nRaw Results:\n{responses}"
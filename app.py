@@ -1,66 +1,142 @@
 import streamlit as st
-from multi_db_executor import get_relevant_tables, run_multi_db_query
-from groq import Groq
-import os
-from dotenv import load_dotenv
+from multi_db_executor import (
+    WARMUP_ON_START, get_relevant_tables, group_tables_by_db, iter_multi_db_query, warm_up
+)
+from analysis import stream_analysis_with_groq
+from db_pools import start_pool_tuner
+from bounded_sql import format_bounded
+from comparison import PRICE_COLUMN, comparison_frame, pivot_comparison, value_column
+from price_store import PRICE_STORE_DB, should_route
+from result_cache import result_cache
+from singleflight import SINGLEFLIGHT_ENABLED, SingleFlight, make_key
+from tracing import trace, start_metrics_server
 
-load_dotenv()
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+def render_result(result: dict):
+    st.subheader(f"{result['db'].replace('_', ' ').title()}")
+    st.caption(f"{result['status']} · {result['elapsed']:.1f}s · "
+               f"{result.get('llm_calls', '?')} LLM calls")
+    if result.get('rows') is not None:
+        st.dataframe([dict(zip(result['columns'], row)) for row in result['rows']],
+                     use_container_width=True)
+        if result.get('truncated'):
+            st.caption(f"Showing {len(result['rows'])} of {result['total_rows'] or 'more'} rows")
+        # The agent's own answer, when it says more than the rows
+        if result['output'] != format_bounded(result):
+            st.text(result['output'])
+    else:
+        st.text(result['output'])
+    if result.get('sql'):
+        with st.expander("SQL"):
+            st.code(result['sql'], language="sql")
 
-def analyze_with_groq(query: str, responses: list) -> str:
-    """Analyze multi-DB responses using Groq"""
+def render_comparison_frame(responses: list):
+    """Per-item price comparison across platforms, merged locally; skipped if the results do not merge"""
     try:
-        response_text = f"Query: {query}\n\nResults:\n"
-        for db_name, output in responses:
-            response_text += f"\n--- {db_name.upper()} ---\n{output}\n"
-
-        prompt = f"""
-        Analyze this quick commerce data query: "{query}"
-        
-        Database Results:
-        {response_text}
-        
-        Provide:
-        1. Clear summary of findings
-        2. Key insights and comparisons 
-        3. Actionable recommendations
-        4. Most relevant information
-        
-        Keep it concise and user-friendly.
-        The output should be in markdown format within 3 lines.
-        """
-        
-        completion = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
-            temperature=0.1
-        )
-        return completion.choices[0].message.content
-        
+        frame = comparison_frame(responses)
+        if frame is None or "match_key" not in frame or frame["platform"].nunique() < 2:
+            return
+        price = value_column(frame, PRICE_COLUMN)
+        if price is None:
+            return
+        pivot = pivot_comparison(frame, price)
     except Exception as e:
-        return f"Analysis failed: {e}\n\nRaw Results:\n{responses}"
+        print(f"Could not build the comparison table: {e}")
+        return
+    st.subheader("Comparison")
+    st.dataframe(pivot, use_container_width=True)
+
+def render_timings(question_trace):
+    rows = [
+        {key: span.get(key) for key in
+         ["name", "db", "duration_ms", "status", "cache", "plan_cache", "prompt_tokens",
+          "completion_tokens", "rows", "statement"]}
+        for span in question_trace.timings()
+    ]
+    st.dataframe(rows, use_container_width=True)
+
+# Serves /metrics when METRICS_PORT is set
+start_metrics_server()
+# Clients, engines and the most used agents are built in the background, once per process
+if WARMUP_ON_START:
+    warm_up()
+# Resizes the platform DB pools from observed concurrency when POOL_ADAPTIVE=1
+start_pool_tuner()
 
 # Streamlit UI
 st.set_page_config(page_title="Quick Commerce SQL Agent", page_icon="🛒")
 st.title("🛒 Quick Commerce SQL Agent")
 
-query = st.text_input("Ask about products across platforms:", 
+mode = st.sidebar.radio("SQL generation", ["agent", "single_shot"],
+                        help="agent: multi-step SQL agent; single_shot: one prompt with local validation")
+
+query = st.text_input("Ask about products across platforms:",
                      placeholder="e.g., Cheapest onions available")
 
-if query:
-    with st.spinner("🔍 Finding relevant data..."):
-        tables = get_relevant_tables(query)
+show_timings = st.sidebar.checkbox("Show timings")
+cache_stats = result_cache.stats()
+st.sidebar.caption(f"SQL result cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                   f"{cache_stats['entries']} entries")
+
+def answer_live(query: str, mode: str) -> dict:
+    """Answer ``query``, rendering each step as it completes"""
+    routed = should_route(query)
+    if routed:
+        tables = []
+        db_names = [PRICE_STORE_DB]
+        st.info("💰 Answering from the unified price store")
+    else:
+        with st.spinner("🔍 Finding relevant data..."):
+            tables = get_relevant_tables(query)
         st.info(f"📊 Using {len(tables)} relevant tables")
         st.write(tables)
-        
-        raw_responses = run_multi_db_query(query, tables)
-        analysis = analyze_with_groq(query, raw_responses)
-        
-        st.success("✅ Analysis Complete")
-        st.write(analysis)
-        
-        # Raw results in expander
-        with st.expander("🔍 View Raw Database Results"):
-            for db_name, output in raw_responses:
-                st.subheader(f"{db_name.replace('_', ' ').title()}")
-                st.text(output)
\ No newline at end of file
+        db_names = list(group_tables_by_db(tables))
+
+    # One placeholder per platform, filled as soon as that database answers
+    placeholders = {db_name: st.empty() for db_name in db_names}
+    for db_name in db_names:
+        placeholders[db_name].info(f"⏳ Querying {db_name.replace('_', ' ').title()}...")
+
+    raw_responses = []
+    for result in iter_multi_db_query(query, tables, mode=mode, price_store=routed):
+        raw_responses.append(result)
+        with placeholders[result['db']].container():
+            render_result(result)
+
+    # Analyse in relevance order, not completion order
+    raw_responses.sort(key=lambda result: db_names.index(result['db']))
+    render_comparison_frame(raw_responses)
+    st.success("✅ Analysis")
+    analysis = st.write_stream(stream_analysis_with_groq(query, raw_responses))
+    return {"routed": routed, "tables": tables, "responses": raw_responses, "analysis": analysis}
+
+def render_answer(answer: dict):
+    """Render an answer computed by another session"""
+    st.info("🔗 Joined an identical question already being answered")
+    if answer["routed"]:
+        st.info("💰 Answering from the unified price store")
+    else:
+        st.info(f"📊 Using {len(answer['tables'])} relevant tables")
+        st.write(answer["tables"])
+    for result in answer["responses"]:
+        render_result(result)
+    render_comparison_frame(answer["responses"])
+    st.success("✅ Analysis")
+    st.markdown(answer["analysis"])
+
+@st.cache_resource
+def get_question_flight() -> SingleFlight:
+    # One per server process, shared by every session
+    return SingleFlight("question")
+
+if query:
+    with trace(query) as question_trace:
+        if SINGLEFLIGHT_ENABLED:
+            answer, shared = get_question_flight().do(make_key(query, mode), answer_live, query, mode)
+            if shared:
+                render_answer(answer)
+        else:
+            answer_live(query, mode)
+
+    if show_timings:
+        with st.expander("⏱️ Timings", expanded=True):
+            render_timings(question_trace)
@@ -0,0 +1,255 @@
+import asyncio
+import threading
+import time
+from functools import lru_cache
+from sqlalchemy import make_url
+import multi_db_executor as executor
+from db_pools import create_pooled_async_engine
+from price_store import should_route
+from result_cache import acached_execute_bounded
+from schema_prompt import question_context
+from singleflight import SINGLEFLIGHT_ENABLED, AsyncSingleFlight, make_key
+from analysis import aanalyze_with_groq
+from sql_generation import build_sql_prompt, build_repair_prompt, extract_sql, validate_sql
+from table_retrieval import candidate_count, hybrid_tables
+from tracing import span, trace, llm_callback
+from vector_store import LocalTableStore
+
+# Async drivers for the sync URLs in DB_ENGINES
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+@lru_cache(maxsize=None)
+def get_async_engine(db_name: str):
+    """Async engine for a platform DB, built from the same URL as DB_ENGINES"""
+    # From the configured URL, without creating the sync engine
+    url = make_url(executor.DB_ENGINES.urls[db_name])
+    async_url = url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+    return create_pooled_async_engine(db_name, async_url)
+
+
+async def arun_sql(db_name: str, sql: str) -> dict:
+    """Execute SQL on the async engine under the row and byte caps, through the result cache"""
+    return await acached_execute_bounded(get_async_engine(db_name), db_name, sql)
+
+
+async def aget_relevant_tables(query: str, top_k: int = 5):
+    """Async variant of get_relevant_tables"""
+    with span("embed"):
+        query_vec = await executor.get_embedder().aembed_query(query)
+    store = executor.get_table_store()
+    # Local search is a single matmul; only a remote store needs a thread
+    if isinstance(store, LocalTableStore):
+        with span("vector_search", top_k=top_k):
+            matches = store.query(query_vec, top_k=candidate_count(top_k))
+        return hybrid_tables(query, matches, top_k, store.get_metadata)
+    with span("vector_search", top_k=top_k):
+        matches = await asyncio.to_thread(store.query, query_vec, candidate_count(top_k))
+    return await asyncio.to_thread(hybrid_tables, query, matches, top_k, store.get_metadata)
+
+
+async def _agenerate_with_agent(db_name: str, table_names: list, query: str, hints: bool = True) -> dict:
+    from filtered_sql_database import capture_tool_results
+    agent = executor.get_agent(db_name, table_names)
+    question = executor.question_with_hints(db_name, table_names, query) if hints else query
+    with question_context(query), capture_tool_results() as tool_results:
+        result = await agent.ainvoke({"input": question}, config={"callbacks": [llm_callback]})
+    answer = {
+        "output": result.get("output", result),
+        "sql": executor.extract_executed_sql(result),
+        "llm_calls": len(result.get("intermediate_steps", [])) + 1,
+    }
+    if answer["sql"] in tool_results:
+        answer = executor.with_rows(answer, tool_results[answer["sql"]])
+    return answer
+
+
+async def _agenerate_single_shot(db_name: str, table_names: list, query: str, hints: bool = True) -> dict:
+    db = executor.get_cached_database(db_name, tuple(table_names))
+    with question_context(query):
+        table_info = await asyncio.to_thread(db.get_table_info)
+    table_columns = await asyncio.to_thread(db.get_table_columns)
+    question = executor.question_with_hints(db_name, table_names, query) if hints else query
+    prompt = build_sql_prompt(db.dialect, table_info, question)
+    sql = extract_sql((await executor.get_llm().ainvoke(prompt, config={"callbacks": [llm_callback]})).content)
+    llm_calls = 1
+    while True:
+        try:
+            validate_sql(sql, table_columns, db.dialect)
+            return executor.sql_answer(await arun_sql(db_name, sql), sql, llm_calls=llm_calls)
+        except Exception as e:
+            if llm_calls > 1:
+                raise
+            print(f"Repairing SQL for {db_name}: {e}")
+            sql = extract_sql((await executor.get_llm().ainvoke(build_repair_prompt(prompt, sql, e),
+                                                          config={"callbacks": [llm_callback]})).content)
+            llm_calls += 1
+
+
+async def _aanswer_db(db_name: str, table_names: list, fingerprint: str, query: str, mode: str,
+                      hints: bool = True) -> dict:
+    """Async variant of multi_db_executor._answer_db"""
+    plan_cache = executor.plan_cache
+    key = plan_cache.make_key(db_name, table_names, query)
+    fingerprint = executor.plan_fingerprint(fingerprint, hints)
+    cached_sql = plan_cache.get(key, fingerprint)
+    if cached_sql is not None:
+        try:
+            return executor.sql_answer(await arun_sql(db_name, cached_sql), cached_sql,
+                                       plan_cache="hit", llm_calls=0)
+        except Exception as e:
+            print(f"Cached SQL failed on {db_name}, regenerating: {e}")
+            plan_cache.invalidate(key=key)
+
+    if mode == "single_shot":
+        answer = await _agenerate_single_shot(db_name, table_names, query, hints)
+    else:
+        answer = await _agenerate_with_agent(db_name, table_names, query, hints)
+    if answer["sql"]:
+        plan_cache.put(key, answer["sql"], fingerprint)
+    answer["plan_cache"] = "miss"
+    return answer
+
+
+async def _aanswer_with_shared_plan(db_name: str, leader: str, leader_task, table_names: list,
+                                    fingerprint: str, query: str, mode: str) -> dict:
+    try:
+        # Shielded: this database timing out must not cancel the leader every member waits on
+        sql = (await asyncio.shield(leader_task)).get("sql")
+    except Exception:
+        sql = None
+    if sql:
+        try:
+            return executor.sql_answer(await arun_sql(db_name, sql), sql, plan_cache="shared",
+                                       shared_from=leader, llm_calls=0)
+        except Exception as e:
+            print(f"Shared SQL from {leader} failed on {db_name}, generating its own: {e}")
+    return await _aanswer_db(db_name, table_names, fingerprint, query, mode)
+
+
+async def _atimed(db_name: str, db_timeout: float, answer) -> dict:
+    """Await one database's answer under its own timeout and tag the outcome"""
+    start = time.monotonic()
+    # A shared-plan leader keeps running past its own timeout for its followers
+    if asyncio.isfuture(answer):
+        answer = asyncio.shield(answer)
+    try:
+        with span("db_answer", db=db_name) as current:
+            result = {"status": "ok", **await asyncio.wait_for(answer, timeout=db_timeout)}
+            current.update(plan_cache=result.get("plan_cache"), llm_calls=result.get("llm_calls"))
+    except asyncio.TimeoutError:
+        result = {"status": "timeout", "output": f"Error: timed out after {db_timeout:.1f}s"}
+    except Exception as e:
+        result = {"status": "error", "output": f"Error: {str(e)}"}
+    return {"db": db_name, "elapsed": time.monotonic() - start, **result}
+
+
+async def arun_multi_db_query(query: str, relevant_tables: list, db_timeout: float = None,
+                              request_timeout: float = None, shared_plan: bool = None,
+                              mode: str = None, price_store: bool = None):
+    """Async variant of run_multi_db_query, using ainvoke and async engines.
+
+    No worker pool is needed: every database is a task on the event loop,
+    so one process can keep many questions in flight while they wait on
+    the LLM and the databases.
+    """
+    db_timeout = db_timeout if db_timeout is not None else executor.DB_TIMEOUT_S
+    request_timeout = request_timeout if request_timeout is not None else executor.REQUEST_TIMEOUT_S
+    shared_plan = shared_plan if shared_plan is not None else executor.SHARED_PLAN
+    mode = mode or executor.EXECUTION_MODE
+
+    if price_store is None:
+        price_store = await asyncio.to_thread(should_route, query)
+    if price_store:
+        # The store is a single indexed table behind a sync engine
+        return [await asyncio.to_thread(executor.price_store_result, query)]
+
+    db_tables = executor.group_tables_by_db(relevant_tables)
+    fingerprints = executor.schema_fingerprints(relevant_tables)
+    if not db_tables:
+        return []
+
+    answers = {}
+    if shared_plan:
+        union, groups = await asyncio.to_thread(executor.shared_plan_groups, db_tables)
+        for group_fingerprint, members in groups:
+            leader = members[0]
+            answers[leader] = asyncio.ensure_future(
+                _aanswer_db(leader, union, group_fingerprint, query, mode, hints=False)
+            )
+            for db_name in members[1:]:
+                answers[db_name] = _aanswer_with_shared_plan(
+                    db_name, leader, answers[leader], db_tables[db_name], fingerprints[db_name], query, mode
+                )
+    for db_name, table_names in db_tables.items():
+        if db_name not in answers:
+            answers[db_name] = _aanswer_db(db_name, table_names, fingerprints[db_name], query, mode)
+
+    tasks = {
+        db_name: asyncio.ensure_future(_atimed(db_name, db_timeout, answers[db_name]))
+        for db_name in db_tables
+    }
+    await asyncio.wait(tasks.values(), timeout=request_timeout)
+
+    responses = []
+    for db_name, task in tasks.items():
+        if task.done():
+            responses.append(task.result())
+        else:
+            task.cancel()
+            responses.append({"db": db_name, "elapsed": request_timeout, "status": "timeout",
+                              "output": f"Error: timed out after {request_timeout:.1f}s"})
+    return responses
+
+
+question_flight = AsyncSingleFlight("question")
+
+
+async def aanswer_question(query: str, mode: str = None, top_k: int = 5) -> dict:
+    """Full async pipeline: table retrieval, per-DB answers and Groq analysis.
+
+    Identical questions asked while one is in flight share its result
+    (``coalesced`` is True for those); treat the returned lists as read-only.
+    """
+    if not SINGLEFLIGHT_ENABLED:
+        return {**await _aanswer_question(query, mode, top_k), "coalesced": False}
+    key = make_key(query, mode or executor.EXECUTION_MODE, top_k)
+    result, shared = await question_flight.do(key, _aanswer_question, query, mode, top_k)
+    return {**result, "coalesced": shared}
+
+
+async def _aanswer_question(query: str, mode: str = None, top_k: int = 5) -> dict:
+    with trace(query) as question_trace:
+        # Price questions answered by the price store need no table retrieval
+        routed = await asyncio.to_thread(should_route, query)
+        tables = [] if routed else await aget_relevant_tables(query, top_k=top_k)
+        responses = await arun_multi_db_query(query, tables, mode=mode, price_store=routed)
+        analysis = await aanalyze_with_groq(query, responses)
+    return {"tables": tables, "responses": responses, "analysis": analysis,
+            "timings": question_trace.timings()}
+
+
+# One long-lived event loop for sync callers, so async engine pools and
+# HTTP clients are reused across calls instead of being tied to a loop
+# that asyncio.run() would close.
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-executor", daemon=True).start()
+    return _loop
+
+
+def run_sync(coro):
+    """Run a coroutine on the shared background loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+def answer_question(query: str, mode: str = None, top_k: int = 5) -> dict:
+    """Sync wrapper around aanswer_question for Streamlit"""
+    return run_sync(aanswer_question(query, mode=mode, top_k=top_k))
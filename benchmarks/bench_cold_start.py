@@ -0,0 +1,119 @@
+"""Cold-start benchmark: import time of multi_db_executor and latency of the first questions.
+
+Each run starts a fresh interpreter against SQLite copies of the platform
+databases and a local table index, with the OpenAI/Gemini clients swapped
+for stubs. It times the import, an optional synchronous warm_up(), and the
+first two questions (retrieval plus every per-database answer), then
+reports the median of each over all runs.
+
+    python benchmarks/bench_cold_start.py --runs 5 --llm-latency 0.2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Only the standard library is imported up front, so a child's import timing starts cold
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+QUESTIONS = ["cheapest onions available", "top selling products"]
+STAGES = ["import", "warm_up", "first_query", "second_query"]
+
+
+def prepare(args, workdir: str) -> dict:
+    """Build the databases, embed their schemas and record agent usage for warm-up"""
+    from bench_pipeline import build_sqlite_copies, configure_environment, install_stubs
+    from stubs import QUESTION_SQL
+
+    urls = build_sqlite_copies(workdir, args.scale, args.seed)
+    configure_environment(workdir, urls)
+    executor, embedder_module, _ = install_stubs(args)
+    embedder_module.extract_and_embed_schemas(urls, full=True)
+    for question in QUESTION_SQL:
+        executor.run_multi_db_query(question, executor.get_relevant_tables(question))
+    executor.table_set_usage.flush()
+    return urls
+
+
+def child(args):
+    """One cold start, printed as a JSON line prefixed with RESULT"""
+    timings = {}
+    start = time.perf_counter()
+    import multi_db_executor as executor
+    timings["import"] = time.perf_counter() - start
+
+    from embedding_cache import CachedEmbeddings, EmbeddingCache
+    from resources import registry
+    from stubs import StubChatModel, StubEmbeddings
+    registry.set("llm", StubChatModel(latency=args.llm_latency))
+    registry.set("embedder", CachedEmbeddings(
+        StubEmbeddings(latency=args.embed_latency), "stub-embedding",
+        EmbeddingCache(os.environ["EMBEDDING_CACHE_PATH"])
+    ))
+
+    start = time.perf_counter()
+    if args.warm_up:
+        executor.warm_up(background=False)
+    timings["warm_up"] = time.perf_counter() - start
+
+    for stage, question in zip(["first_query", "second_query"], QUESTIONS):
+        start = time.perf_counter()
+        executor.run_multi_db_query(question, executor.get_relevant_tables(question))
+        timings[stage] = time.perf_counter() - start
+    print("RESULT " + json.dumps(timings), flush=True)
+
+
+def run_children(args, warm_up: bool) -> list:
+    command = [sys.executable, os.path.abspath(__file__), "--child", "--scale", str(args.scale),
+               "--llm-latency", str(args.llm_latency), "--embed-latency", str(args.embed_latency)]
+    if warm_up:
+        command.append("--warm-up")
+    results = []
+    for _ in range(args.runs):
+        output = subprocess.run(command, cwd=ROOT, env=os.environ, capture_output=True, text=True, check=True)
+        results.extend(json.loads(line[len("RESULT "):])
+                       for line in output.stdout.splitlines() if line.startswith("RESULT "))
+    return results
+
+
+def report(label: str, results: list):
+    import numpy as np
+
+    print(f"\n{label}: median of {len(results)} cold starts")
+    print(f"  {'stage':<13} {'p50 ms':>10} {'max ms':>10}")
+    for stage in STAGES:
+        values = [r[stage] * 1000 for r in results]
+        print(f"  {stage:<13} {np.median(values):>10.2f} {max(values):>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    parser.add_argument("--groq-latency", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None, help="defaults to a fresh temporary directory")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--warm-up", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args)
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="sql_agents_cold_start_")
+    prepare(args, workdir)
+    report("lazy (no warm-up)", run_children(args, warm_up=False))
+    report("synchronous warm-up", run_children(args, warm_up=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Offline end-to-end benchmark of get_relevant_tables -> run_multi_db_query -> analysis.
+
+Builds SQLite copies of the four platform databases from fake_data's
+generator, indexes their schemas into a local table store with a stub
+embedder, swaps the OpenAI/Gemini/Groq clients for stubs with simulated
+latency, then replays a question corpus at each requested concurrency
+and scale factor. Reports p50/p95/p99 per stage and overall throughput.
+
+    python benchmarks/bench_pipeline.py --scale 1 10 --concurrency 1 8 --llm-latency 0.2
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "fake_data"))
+
+from comparison import comparison_frame  # noqa: E402
+from generate import PLATFORMS, SCHEMA_SQL, generate_tables  # noqa: E402
+from stubs import QUESTION_SQL, StubChatModel, StubEmbeddings, StubGroqClient  # noqa: E402
+
+STAGES = ["embed", "search", "execute", "merge", "analyze", "total"]
+
+
+def build_sqlite_copies(directory: str, scale: float, seed: int) -> dict:
+    """Create one SQLite database per platform and return their URLs"""
+    urls = {}
+    ddl = SCHEMA_SQL.replace("SERIAL PRIMARY KEY", "INTEGER PRIMARY KEY")
+    for platform_index, db_name in enumerate(PLATFORMS):
+        path = os.path.join(directory, f"{db_name}_{scale:g}.sqlite3")
+        if not os.path.exists(path):
+            conn = sqlite3.connect(path)
+            conn.executescript(ddl)
+            for table, columns, arrays in generate_tables(scale, seed, platform_index):
+                values = [
+                    # Space-separated timestamps compare like Postgres renders them
+                    np.char.replace(np.datetime_as_string(array), "T", " ").tolist()
+                    if np.issubdtype(array.dtype, np.datetime64)
+                    else array.tolist()
+                    for array in arrays
+                ]
+                placeholders = ", ".join("?" for _ in columns)
+                conn.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", zip(*values)
+                )
+            conn.commit()
+            conn.close()
+        urls[db_name] = f"sqlite:///{path}"
+    return urls
+
+
+def configure_environment(workdir: str, urls: dict, price_store: bool = False):
+    """Point the app at local stores and stub credentials before it is imported"""
+    for key in ["OPENAI_API_KEY", "GEMINI_API_KEY", "GROQ_API_KEY"]:
+        os.environ.setdefault(key, "stub")
+    os.environ.pop("PINECONE_API_KEY", None)
+    os.environ["TABLE_STORE_BACKEND"] = "local"
+    os.environ["LOCAL_TABLE_INDEX_PATH"] = os.path.join(workdir, "table_index")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(workdir, "embedding_cache.sqlite3")
+    os.environ["NAME_INDEX_PATH"] = os.path.join(workdir, "name_index.json")
+    os.environ["TABLE_SET_USAGE_PATH"] = os.path.join(workdir, "table_set_usage.json")
+    os.environ["SCHEMA_CATALOG_PATH"] = os.path.join(workdir, "schema_catalog.json")
+    # No per-span trace file in the timed path; metrics stay next to the other bench files
+    os.environ["TRACE_LOG_PATH"] = ""
+    os.environ["METRICS_PATH"] = os.path.join(workdir, "metrics.prom")
+    os.environ["PRICE_STORE_URL"] = f"sqlite:///{os.path.join(workdir, 'price_store.sqlite3')}"
+    os.environ["PRICE_STORE_ROUTING"] = "1" if price_store else "0"
+    for db_name, url in urls.items():
+        os.environ[f"{db_name}_url"] = url
+
+
+def install_stubs(args):
+    """Import the app modules and replace their remote clients with stubs"""
+    import analysis
+    import multi_db_executor
+    import pinecone_embedder
+    from resources import registry
+    from embedding_cache import CachedEmbeddings, EmbeddingCache
+
+    embedder = CachedEmbeddings(
+        StubEmbeddings(latency=args.embed_latency), "stub-embedding",
+        EmbeddingCache(os.environ["EMBEDDING_CACHE_PATH"])
+    )
+    pinecone_embedder.embedder = embedder
+    registry.set("embedder", embedder)
+    registry.set("table_store", pinecone_embedder.table_store)
+    registry.set("llm", StubChatModel(latency=args.llm_latency))
+    analysis.groq_client = StubGroqClient(latency=args.groq_latency)
+    analysis.async_groq_client = StubGroqClient(latency=args.groq_latency, use_async=True)
+    return multi_db_executor, pinecone_embedder, analysis
+
+
+def answer(executor, analysis, question: str, mode: str) -> dict:
+    """Run one question through the pipeline, timing each stage"""
+    # Imported here: app modules read their paths from the environment configure_environment sets
+    from table_retrieval import candidate_count, hybrid_tables
+
+    timings = {}
+    start = time.perf_counter()
+    query_vec = executor.get_embedder().embed_query(question)
+    timings["embed"] = time.perf_counter() - start
+
+    mark = time.perf_counter()
+    store = executor.get_table_store()
+    tables = hybrid_tables(question, store.query(query_vec, top_k=candidate_count(5)), 5, store.get_metadata)
+    timings["search"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    responses = executor.run_multi_db_query(question, tables, mode=mode)
+    timings["execute"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    comparison_frame(responses)
+    timings["merge"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    analysis.analyze_with_groq(question, responses)
+    timings["analyze"] = time.perf_counter() - mark
+
+    timings["total"] = time.perf_counter() - start
+    timings["errors"] = sum(1 for response in responses if response["status"] != "ok")
+    return timings
+
+
+def report(label: str, results: list, wall: float):
+    print(f"\n{label}: {len(results)} questions in {wall:.2f}s "
+          f"({len(results) / wall:.2f} q/s, {sum(r['errors'] for r in results)} DB errors)")
+    print(f"  {'stage':<8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for stage in STAGES:
+        p50, p95, p99 = np.percentile([r[stage] * 1000 for r in results], [50, 95, 99])
+        print(f"  {stage:<8} {p50:>10.2f} {p95:>10.2f} {p99:>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--rounds", type=int, default=3, help="times the corpus is replayed per run")
+    parser.add_argument("--mode", choices=["agent", "single_shot"], default="agent")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    parser.add_argument("--groq-latency", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--price-store", action="store_true",
+                        help="sync the unified price store and route price questions to it")
+    parser.add_argument("--workdir", default=None, help="defaults to a fresh temporary directory")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="sql_agents_bench_")
+    corpus = list(QUESTION_SQL) * args.rounds
+    for scale in args.scale:
+        urls = build_sqlite_copies(workdir, scale, args.seed)
+        if "multi_db_executor" not in sys.modules:
+            configure_environment(workdir, urls, args.price_store)
+            executor, embedder_module, analysis = install_stubs(args)
+        else:
+            # Later scales reuse the imported modules with fresh engines and caches
+            from db_pools import create_pooled_engine
+            for db_name, url in urls.items():
+                executor.DB_ENGINES[db_name] = create_pooled_engine(db_name, url)
+            executor.get_cached_database.cache_clear()
+            executor.get_cached_agent.cache_clear()
+            executor.plan_cache.invalidate()
+            # Same table names, different data: nothing from the previous scale may be served
+            from filtered_sql_database import schema_info_cache
+            from result_cache import result_cache, table_versions
+            result_cache.invalidate()
+            table_versions.invalidate()
+            schema_info_cache.invalidate()
+        embedder_module.extract_and_embed_schemas(urls, full=True)
+        if args.price_store:
+            from price_store import sync_price_store
+            sync_price_store(urls, full=True)
+
+        for concurrency in args.concurrency:
+            executor.plan_cache.invalidate()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(lambda q: answer(executor, analysis, q, args.mode), corpus))
+            report(f"scale={scale:g} concurrency={concurrency} mode={args.mode}",
+                   results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
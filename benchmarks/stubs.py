@@ -0,0 +1,163 @@
+"""Offline stand-ins for the OpenAI, Gemini and Groq clients used by the pipeline.
+
+Responses are deterministic and each call sleeps for a configurable
+simulated latency, so benchmarks measure our own overhead plus a
+predictable model cost.
+"""
+import asyncio
+import hashlib
+import time
+from types import SimpleNamespace
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Benchmark questions and the SQL the stub model answers them with
+QUESTION_SQL = {
+    "cheapest onions available":
+        "SELECT p.name, pr.price FROM product p JOIN price pr ON pr.product_id = p.id ORDER BY pr.price LIMIT 5",
+    "which products are out of stock":
+        "SELECT p.name FROM product p JOIN inventory i ON i.product_id = p.id WHERE i.quantity = 0 LIMIT 10",
+    "products with the highest discount":
+        "SELECT p.name, d.discount_percent FROM discount d JOIN product p ON p.id = d.product_id "
+        "ORDER BY d.discount_percent DESC LIMIT 5",
+    "how many orders were delivered":
+        "SELECT COUNT(*) FROM app_order WHERE status = 'delivered'",
+    "top selling products":
+        "SELECT product_id, SUM(quantity) AS units FROM order_item GROUP BY product_id ORDER BY units DESC LIMIT 5",
+    "number of users per city":
+        "SELECT c.name, COUNT(u.id) AS users FROM city c JOIN app_user u ON u.city_id = c.id "
+        "GROUP BY c.name ORDER BY users DESC LIMIT 10",
+    "price of product 1":
+        "SELECT price FROM price WHERE product_id = 1",
+    "average order value":
+        "SELECT AVG(quantity * price_at_purchase) FROM order_item",
+}
+
+# The same price questions answered from the unified price store
+PRICE_STORE_SQL = {
+    "cheapest onions available":
+        "SELECT platform, product_name, final_price FROM platform_price WHERE in_stock = 1 "
+        "ORDER BY final_price LIMIT 5",
+    "which products are out of stock":
+        "SELECT platform, product_name FROM platform_price WHERE in_stock = 0 LIMIT 10",
+    "products with the highest discount":
+        "SELECT platform, product_name, discount_percent FROM platform_price "
+        "ORDER BY discount_percent DESC LIMIT 5",
+    "price of product 1":
+        "SELECT platform, price, final_price FROM platform_price WHERE product_id = 1",
+}
+
+
+def sql_for(prompt: str) -> str:
+    """SQL for the benchmark question mentioned in a prompt"""
+    lowered = prompt.lower()
+    corpus = PRICE_STORE_SQL if "platform_price" in lowered else QUESTION_SQL
+    for question, sql in corpus.items():
+        if question in lowered:
+            return sql
+    return "SELECT 1"
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model that plays both the ReAct SQL agent and single-shot SQL writer"""
+
+    latency: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _reply(self, prompt: str) -> str:
+        if "Action Input:" not in prompt:
+            # Single-shot or repair prompt: answer with bare SQL
+            return sql_for(prompt)
+        scratchpad = prompt.rsplit("Question:", 1)[-1]
+        if "Observation:" in scratchpad:
+            observation = scratchpad.rsplit("Observation:", 1)[-1].split("Thought:")[0].strip()
+            return f"Thought: I now know the final answer\nFinal Answer: {observation}"
+        return f"Thought: I should query the database\nAction: sql_db_query\nAction Input: {sql_for(prompt)}"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        text = self._reply("\n".join(str(message.content) for message in messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        text = self._reply("\n".join(str(message.content) for message in messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+class StubEmbeddings:
+    """Deterministic hashed bag-of-words embeddings"""
+
+    def __init__(self, dimension: int = 768, latency: float = 0.0):
+        self.dimension = dimension
+        self.latency = latency
+        self.calls = 0
+
+    def _embed(self, text: str) -> list:
+        vector = [0.0] * self.dimension
+        for token in text.lower().replace(",", " ").replace(":", " ").split():
+            vector[int(hashlib.md5(token.encode()).hexdigest(), 16) % self.dimension] += 1.0
+        return vector
+
+    def embed_query(self, text: str) -> list:
+        self.calls += 1
+        time.sleep(self.latency)
+        return self._embed(text)
+
+    def embed_documents(self, texts: list) -> list:
+        self.calls += 1
+        time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self._embed(text)
+
+
+def _completion(content: str):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _chunk(content: str):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class _StubCompletions:
+    def __init__(self, client):
+        self.client = client
+
+    def create(self, messages, model=None, temperature=None, stream=False, **kwargs):
+        self.client.calls += 1
+        time.sleep(self.client.latency)
+        summary = self.client.summary
+        if stream:
+            return iter([_chunk(word + " ") for word in summary.split()])
+        return _completion(summary)
+
+
+class _StubAsyncCompletions(_StubCompletions):
+    async def create(self, messages, model=None, temperature=None, stream=False, **kwargs):
+        self.client.calls += 1
+        await asyncio.sleep(self.client.latency)
+        return _completion(self.client.summary)
+
+
+class StubGroqClient:
+    """Groq client stand-in supporting plain and streaming completions"""
+
+    summary = "**Summary:** results compared across platforms."
+
+    def __init__(self, latency: float = 0.0, use_async: bool = False):
+        self.latency = latency
+        self.calls = 0
+        completions = _StubAsyncCompletions(self) if use_async else _StubCompletions(self)
+        self.chat = SimpleNamespace(completions=completions)
@@ -0,0 +1,150 @@
+import os
+import sqlglot
+from sqlglot import exp
+from sqlalchemy import text
+from sql_generation import SQLGLOT_DIALECTS
+
+# Caps on what one statement may return to the agent, the analysis or the UI
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "200"))
+SQL_MAX_BYTES = int(os.getenv("SQL_MAX_BYTES", "65536"))
+SQL_FETCH_CHUNK = int(os.getenv("SQL_FETCH_CHUNK", "100"))
+# Run a COUNT(*) over the original query when a result is truncated
+SQL_COUNT_TRUNCATED = os.getenv("SQL_COUNT_TRUNCATED", "1") == "1"
+
+
+def apply_row_limit(sql: str, dialect: str, limit: int) -> str:
+    """Add ``LIMIT limit`` to a query without one, or lower a larger one.
+
+    SQL that sqlglot cannot parse, or that is not a query, is returned
+    unchanged; the fetch loop still enforces the cap.
+    """
+    try:
+        tree = sqlglot.parse_one(sql, read=SQLGLOT_DIALECTS.get(dialect, dialect))
+    except sqlglot.errors.SqlglotError:
+        return sql
+    if not isinstance(tree, exp.Query):
+        return sql
+    current = tree.args.get("limit")
+    if current is not None:
+        value = current.expression
+        if not isinstance(value, exp.Literal) or not value.is_int or int(value.this) <= limit:
+            return sql
+    return tree.limit(limit).sql(dialect=SQLGLOT_DIALECTS.get(dialect, dialect))
+
+
+class RowBudget:
+    """Accumulates fetched rows until the row or byte cap is reached"""
+
+    def __init__(self, max_rows: int, max_bytes: int):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.rows = []
+        self.size = 0
+        self.truncated = False
+
+    def add(self, chunk) -> bool:
+        """Take rows from ``chunk``; returns False once the budget is spent"""
+        for row in chunk:
+            row = tuple(row)
+            row_size = len(repr(row))
+            if len(self.rows) >= self.max_rows or self.size + row_size > self.max_bytes:
+                self.truncated = True
+                return False
+            self.rows.append(row)
+            self.size += row_size
+        return True
+
+
+def readonly_options(engine) -> dict:
+    """Execution options that run a connection's transaction read-only, where the dialect supports it"""
+    if engine.dialect.name == "postgresql":
+        return {"postgresql_readonly": True}
+    return {}
+
+
+def _count_sql(sql: str) -> str:
+    return f"SELECT COUNT(*) FROM ({sql}) AS bounded_count"
+
+
+def _result(columns: list, budget: RowBudget, total_rows) -> dict:
+    return {
+        "columns": columns,
+        "rows": budget.rows,
+        "truncated": budget.truncated,
+        "total_rows": total_rows if budget.truncated else len(budget.rows),
+    }
+
+
+def execute_bounded(engine, sql: str, dialect: str = None, max_rows: int = None,
+                    max_bytes: int = None, chunk_size: int = None) -> dict:
+    """Run one query with a server-side cursor, fetching in chunks under a row and byte cap.
+
+    Returns ``{"columns", "rows", "truncated", "total_rows"}``. ``rows``
+    holds at most ``max_rows`` tuples; when the result was cut short,
+    ``total_rows`` is the full count (or None if counting is disabled or
+    fails). On Postgres the transaction is read-only.
+    """
+    max_rows = max_rows or SQL_MAX_ROWS
+    max_bytes = max_bytes or SQL_MAX_BYTES
+    chunk_size = chunk_size or SQL_FETCH_CHUNK
+    dialect = dialect or engine.dialect.name
+    # One extra row tells a result of exactly max_rows apart from a truncated one
+    limited_sql = apply_row_limit(sql, dialect, max_rows + 1)
+
+    budget = RowBudget(max_rows, max_bytes)
+    # Generated SQL runs read-only on the server too, whatever validation missed
+    with engine.connect().execution_options(**readonly_options(engine)) as conn:
+        result = conn.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(text(limited_sql))
+        columns = list(result.keys()) if result.returns_rows else []
+        if result.returns_rows:
+            while True:
+                chunk = result.fetchmany(chunk_size)
+                if not chunk or not budget.add(chunk):
+                    break
+        result.close()
+
+        total_rows = None
+        if budget.truncated and SQL_COUNT_TRUNCATED:
+            try:
+                total_rows = conn.execute(text(_count_sql(sql))).scalar()
+            except Exception as e:
+                print(f"Could not count truncated result: {e}")
+    return _result(columns, budget, total_rows)
+
+
+async def aexecute_bounded(engine, sql: str, dialect: str = None, max_rows: int = None,
+                           max_bytes: int = None, chunk_size: int = None) -> dict:
+    """Async variant of execute_bounded for an AsyncEngine"""
+    max_rows = max_rows or SQL_MAX_ROWS
+    max_bytes = max_bytes or SQL_MAX_BYTES
+    chunk_size = chunk_size or SQL_FETCH_CHUNK
+    dialect = dialect or engine.dialect.name
+    limited_sql = apply_row_limit(sql, dialect, max_rows + 1)
+
+    budget = RowBudget(max_rows, max_bytes)
+    async with engine.connect() as conn:
+        await conn.execution_options(**readonly_options(engine))
+        result = await conn.stream(text(limited_sql), execution_options={"max_row_buffer": chunk_size})
+        columns = list(result.keys())
+        async for chunk in result.partitions(chunk_size):
+            if not budget.add(chunk):
+                break
+        await result.close()
+
+        total_rows = None
+        if budget.truncated and SQL_COUNT_TRUNCATED:
+            try:
+                total_rows = (await conn.execute(text(_count_sql(sql)))).scalar()
+            except Exception as e:
+                print(f"Could not count truncated result: {e}")
+    return _result(columns, budget, total_rows)
+
+
+def format_bounded(result: dict) -> str:
+    """Render rows the way the agent's query tool does, plus a truncation marker"""
+    output = str(result["rows"]) if result["rows"] else ""
+    if result["truncated"]:
+        total = result["total_rows"] if result["total_rows"] is not None else "unknown"
+        output += (f"\n[truncated: showing {len(result['rows'])} of {total} rows; "
+                   f"add filters, aggregation or a LIMIT to narrow the result]")
+    return output
@@ -0,0 +1,136 @@
+import re
+import ast
+from decimal import Decimal
+import pandas as pd
+
+# Columns that identify the same item on different platforms
+PRODUCT_COLUMN = re.compile(r"^(product_?)?name$|^product$|^item(_name)?$", re.IGNORECASE)
+BRAND_COLUMN = re.compile(r"^brand(_?name)?$", re.IGNORECASE)
+UNIT_COLUMN = re.compile(r"^unit(_?name)?$", re.IGNORECASE)
+# Values compared across platforms
+PRICE_COLUMN = re.compile(r"price|cost|amount|mrp", re.IGNORECASE)
+STOCK_COLUMN = re.compile(r"^(quantity|qty|in_stock|stock\w*|available\w*)$", re.IGNORECASE)
+
+
+def result_rows(result: dict, columns: list = None):
+    """(columns, rows) of a successful result, or None for free-text answers.
+
+    Uses the rows of executed SQL; otherwise an agent answer that is just
+    the query tool's list of tuples, named by ``columns`` if they fit.
+    """
+    if result.get("status") != "ok":
+        return None
+    rows = result.get("rows")
+    columns = result.get("columns") if rows is not None else columns
+    if rows is None:
+        try:
+            rows = ast.literal_eval(str(result["output"]).strip())
+        except (ValueError, SyntaxError):
+            return None
+        if not isinstance(rows, list) or not all(isinstance(row, tuple) for row in rows):
+            return None
+    if columns and rows and any(len(row) != len(columns) for row in rows):
+        columns = None
+    width = len(columns) if columns else max((len(row) for row in rows), default=0)
+    if any(len(row) != width for row in rows):
+        return None
+    return list(columns or [f"col_{i + 1}" for i in range(width)]), rows
+
+
+def unique_columns(columns: list) -> list:
+    """Column names with repeats suffixed, e.g. ``SELECT p.name, b.name`` gives name, name_1"""
+    unique, counts = [], {}
+    for column in columns:
+        name = column
+        while name in unique:
+            counts[column] = counts.get(column, 0) + 1
+            name = f"{column}_{counts[column]}"
+        unique.append(name)
+    return unique
+
+
+def result_frame(result: dict, columns: list = None):
+    """DataFrame of one result with numeric columns (Decimal included) as floats, or None"""
+    parsed = result_rows(result, columns)
+    if parsed is None:
+        return None
+    columns, rows = parsed
+    frame = pd.DataFrame.from_records(rows, columns=unique_columns(columns))
+    for column in frame.columns[frame.dtypes == object]:
+        values = frame[column].dropna()
+        if len(values) and values.map(lambda v: isinstance(v, (int, float, Decimal))).all():
+            frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    return frame
+
+
+def _normalize(values: pd.Series) -> pd.Series:
+    return (values.fillna("").astype(str).str.lower()
+            .str.replace(r"[^a-z0-9]+", " ", regex=True).str.strip())
+
+
+def key_columns(columns) -> list:
+    """Product, brand and unit columns present, in that order"""
+    return [
+        column
+        for pattern in (PRODUCT_COLUMN, BRAND_COLUMN, UNIT_COLUMN)
+        for column in columns if pattern.search(column)
+    ][:3]
+
+
+def value_column(frame: pd.DataFrame, pattern):
+    """First numeric column whose name matches ``pattern``"""
+    numeric = frame.select_dtypes("number").columns
+    return next((column for column in numeric if pattern.search(column)), None)
+
+
+def comparison_frame(responses: list):
+    """Rows of every tabular result stacked with a ``platform`` column.
+
+    ``match_key`` is the normalized product/brand/unit, so the same item
+    lines up across platforms. Rows are sorted by the price column when
+    there is one. Returns None if no result is tabular.
+    """
+    # Agent answers parsed from text have no column names; borrow those of an executed result
+    named = next((result["columns"] for result in responses if result.get("columns")), None)
+    frames = []
+    for result in responses:
+        frame = result_frame(result, named)
+        if frame is not None:
+            # Price store rows already name their platform
+            frames.append(frame if "platform" in frame.columns else frame.assign(platform=result["db"]))
+    if not frames:
+        return None
+    frame = pd.concat(frames, ignore_index=True)
+    keys = key_columns(frame.columns)
+    if keys:
+        frame["match_key"] = _normalize(frame[keys[0]])
+        for column in keys[1:]:
+            frame["match_key"] += "|" + _normalize(frame[column])
+    price = value_column(frame, PRICE_COLUMN)
+    if price is not None:
+        frame = frame.sort_values(price, kind="stable", na_position="last", ignore_index=True)
+    return frame[["platform"] + [column for column in frame.columns if column != "platform"]]
+
+
+def pivot_comparison(frame: pd.DataFrame, value: str, highest: bool = False) -> pd.DataFrame:
+    """One row per matched item, one ``value`` column per platform, plus the best platform.
+
+    Items sold on several platforms come first, ordered by their best value.
+    """
+    wide = frame.pivot_table(index="match_key", columns="platform", values=value,
+                             aggfunc="max" if highest else "min")
+    platforms = wide.columns
+    values = wide[platforms]
+    wide["platforms"] = values.notna().sum(axis=1)
+    wide["best_platform"] = values.idxmax(axis=1) if highest else values.idxmin(axis=1)
+    wide["best_" + value] = values.max(axis=1) if highest else values.min(axis=1)
+    wide["spread"] = values.max(axis=1) - values.min(axis=1)
+    return wide.sort_values(["platforms", "best_" + value], ascending=[False, not highest])
+
+
+def best_row(frame: pd.DataFrame, value: str, highest: bool = False):
+    """The row with the lowest (or highest) ``value`` across platforms, or None"""
+    values = frame[value].dropna()
+    if values.empty:
+        return None
+    return frame.loc[values.idxmax() if highest else values.idxmin()]
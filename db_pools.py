@@ -0,0 +1,253 @@
+import os
+import time
+import threading
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from tracing import metrics
+
+# Defaults for every platform database; <db>_pool_size, <db>_max_overflow
+# and <db>_statement_timeout_ms override them per database, next to <db>_url
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "30"))
+# Postgres statement_timeout for every session; 0 leaves the server default
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# Adaptive sizing: every interval, grow a pool whose callers had to wait and
+# shrink one that stayed mostly idle, within [POOL_SIZE_MIN, POOL_SIZE_MAX]
+POOL_ADAPTIVE = os.getenv("POOL_ADAPTIVE", "0") == "1"
+POOL_ADAPT_INTERVAL_S = float(os.getenv("POOL_ADAPT_INTERVAL_S", "30"))
+POOL_SIZE_MIN = int(os.getenv("POOL_SIZE_MIN", "2"))
+POOL_SIZE_MAX = int(os.getenv("POOL_SIZE_MAX", "20"))
+
+
+def pool_settings(db_name: str) -> dict:
+    return {
+        "pool_size": int(os.getenv(f"{db_name}_pool_size", DB_POOL_SIZE)),
+        "max_overflow": int(os.getenv(f"{db_name}_max_overflow", DB_MAX_OVERFLOW)),
+        "statement_timeout_ms": int(os.getenv(f"{db_name}_statement_timeout_ms", DB_STATEMENT_TIMEOUT_MS)),
+    }
+
+
+class PoolStats:
+    """Checkout counters for one pool since the last adaptive-sizing window.
+
+    A checkout is saturated when every pooled connection was already in
+    use, so it had to open an overflow connection or wait for one.
+    """
+
+    def __init__(self):
+        self.peak = 0
+        self.saturated = 0
+        self.checkouts = 0
+        self._lock = threading.Lock()
+
+    def checkout(self, checked_out: int, saturated: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.saturated += saturated
+            self.peak = max(self.peak, checked_out)
+
+    def take(self) -> tuple:
+        """(peak, saturated, checkouts) of the window, starting a new one"""
+        with self._lock:
+            window = (self.peak, self.saturated, self.checkouts)
+            self.peak = self.saturated = self.checkouts = 0
+        return window
+
+
+class _TimedCheckout:
+    """Times how long each checkout takes to hand out a connection.
+
+    That is the wait for a free connection, plus the connect time when the
+    pool opens a new one and the pre-ping.
+    """
+
+    db_name = "unknown"
+    kind = "sync"
+    stats = None
+
+    def connect(self):
+        saturated = self.size() > 0 and self.checkedout() >= self.size()
+        if saturated:
+            metrics.inc("sql_agents_pool_saturated_total", db=self.db_name, kind=self.kind)
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            metrics.inc("sql_agents_pool_timeouts_total", db=self.db_name, kind=self.kind)
+            raise
+        finally:
+            metrics.observe("sql_agents_pool_wait_seconds", time.perf_counter() - started,
+                            db=self.db_name, kind=self.kind)
+        if self.stats is not None:
+            self.stats.checkout(self.checkedout(), saturated)
+        return connection
+
+    def recreate(self):
+        # dispose() swaps in a new pool; it inherits the event listeners, not the labels
+        pool = super().recreate()
+        _register(pool, self.db_name, self.kind)
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _collect():
+    with _pools_lock:
+        pools = list(_pools.items())
+    for (db_name, kind), pool in pools:
+        metrics.set("sql_agents_pool_size", pool.size(), db=db_name, kind=kind)
+        metrics.set("sql_agents_pool_checked_out", pool.checkedout(), db=db_name, kind=kind)
+        metrics.set("sql_agents_pool_overflow", max(pool.overflow(), 0), db=db_name, kind=kind)
+        metrics.set("sql_agents_pool_max_overflow", pool._max_overflow, db=db_name, kind=kind)
+
+
+metrics.add_collector(_collect)
+
+
+def _register(pool, db_name: str, kind: str):
+    pool.db_name = db_name
+    pool.kind = kind
+    pool.stats = PoolStats()
+    with _pools_lock:
+        _pools[(db_name, kind)] = pool
+
+
+def instrument_pool(pool, db_name: str, kind: str = "sync"):
+    """Label a pool for metrics and count its checkouts, new connections and invalidations"""
+    _register(pool, db_name, kind)
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_connection, record, proxy):
+        metrics.inc("sql_agents_pool_checkouts_total", db=db_name, kind=kind)
+
+    @event.listens_for(pool, "connect")
+    def _connect(dbapi_connection, record):
+        metrics.inc("sql_agents_pool_connections_total", db=db_name, kind=kind)
+
+    @event.listens_for(pool, "invalidate")
+    def _invalidate(dbapi_connection, record, exception):
+        # Stale connections found by pool_pre_ping land here, as do ones broken mid-query
+        metrics.inc("sql_agents_pool_invalidations_total", db=db_name, kind=kind)
+    return pool
+
+
+def _connect_args(url, statement_timeout_ms: int, is_async: bool) -> dict:
+    if not statement_timeout_ms or not str(url).startswith("postgresql"):
+        return {}
+    if is_async:
+        return {"server_settings": {"statement_timeout": str(statement_timeout_ms)}}
+    return {"options": f"-c statement_timeout={statement_timeout_ms}"}
+
+
+def create_pooled_engine(db_name: str, url):
+    """Engine for a platform database with its configured, instrumented pool"""
+    settings = pool_settings(db_name)
+    engine = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=DB_POOL_TIMEOUT_S,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        connect_args=_connect_args(url, settings["statement_timeout_ms"], is_async=False)
+    )
+    instrument_pool(engine.pool, db_name)
+    return engine
+
+
+def create_pooled_async_engine(db_name: str, url):
+    """Async engine with the same per-database pool settings"""
+    settings = pool_settings(db_name)
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=DB_POOL_TIMEOUT_S,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        connect_args=_connect_args(url, settings["statement_timeout_ms"], is_async=True)
+    )
+    instrument_pool(engine.sync_engine.pool, db_name, kind="async")
+    return engine
+
+
+def resize_pool(pool: QueuePool, size: int):
+    """Change how many connections a QueuePool keeps, in place.
+
+    The pool tracks open connections as ``size + overflow``; moving
+    ``overflow`` by the opposite amount keeps that count right. Connections
+    above a smaller size are closed as they are returned.
+    """
+    with pool._overflow_lock:
+        pool._overflow -= size - pool._pool.maxsize
+        pool._pool.maxsize = size
+
+
+def adapt_pool(pool: QueuePool) -> int:
+    """Pick this window's pool size from its peak and saturated checkouts; returns the new size"""
+    peak, saturated, checkouts = pool.stats.take()
+    size = pool.size()
+    if not size:
+        return size
+    if saturated:
+        # Checkouts spilled into overflow connections or waited: grow by half again
+        new_size = max(size, min(POOL_SIZE_MAX, size + max(1, size // 2)))
+    elif peak < size // 2:
+        # Mostly idle: give back one connection per window
+        new_size = min(size, max(POOL_SIZE_MIN, peak + 1, size - 1))
+    else:
+        new_size = size
+    if new_size != size:
+        resize_pool(pool, new_size)
+        metrics.inc("sql_agents_pool_resizes_total", db=pool.db_name,
+                    direction="grow" if new_size > size else "shrink")
+        print(f"Pool for {pool.db_name}: {size} -> {new_size} connections "
+              f"(peak {peak} checked out, {saturated} of {checkouts} checkouts saturated)")
+    return new_size
+
+
+_tuner = None
+_tuner_lock = threading.Lock()
+
+
+def _tune_forever(interval: float):
+    while True:
+        time.sleep(interval)
+        with _pools_lock:
+            pools = [pool for (_, kind), pool in _pools.items() if kind == "sync"]
+        for pool in pools:
+            try:
+                adapt_pool(pool)
+            except Exception as e:
+                print(f"Could not resize pool for {pool.db_name}: {e}")
+
+
+def start_pool_tuner(interval: float = None):
+    """Start adaptive sizing of the sync pools in a daemon thread, once per process.
+
+    Does nothing unless POOL_ADAPTIVE=1. Async pools keep their configured size.
+    """
+    global _tuner
+    if not POOL_ADAPTIVE:
+        return None
+    with _tuner_lock:
+        if _tuner is None:
+            _tuner = threading.Thread(target=_tune_forever, args=(interval or POOL_ADAPT_INTERVAL_S,),
+                                      name="pool-tuner", daemon=True)
+            _tuner.start()
+    return _tuner
@@ -0,0 +1,133 @@
+import os
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "embedding_cache.sqlite3")
+)
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "1024"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so trivially different inputs share a key"""
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """Two-level embedding cache: in-memory LRU in front of a SQLite store.
+
+    Keys are hashes of (model, task, normalized text). The disk store is
+    trimmed to ``max_entries`` by least-recent use.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH,
+                 memory_entries: int = EMBEDDING_CACHE_MEMORY_ENTRIES,
+                 max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, task: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{task}\0{normalize_text(text)}".encode()).hexdigest()
+
+    def _remember(self, key: str, vector: list):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE embeddings SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            vector = np.frombuffer(row[0], dtype=np.float32).tolist()
+            self._remember(key, vector)
+            self.hits += 1
+            return vector
+
+    def put(self, key: str, vector: list):
+        with self._lock:
+            self._remember(key, vector)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                (key, np.asarray(vector, dtype=np.float32).tobytes(), time.time())
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+
+class CachedEmbeddings:
+    """Wraps a LangChain embeddings client and serves repeats from an EmbeddingCache"""
+
+    def __init__(self, embedder, model_name: str, cache: EmbeddingCache = None):
+        self.embedder = embedder
+        self.model_name = model_name
+        self.cache = cache or EmbeddingCache()
+
+    def embed_query(self, text: str) -> list:
+        key = self.cache.make_key(self.model_name, "query", text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.embedder.embed_query(text)
+            self.cache.put(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list:
+        key = self.cache.make_key(self.model_name, "query", text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = await self.embedder.aembed_query(text)
+            self.cache.put(key, vector)
+        return vector
+
+    def embed_documents(self, texts: list) -> list:
+        """Embed documents, sending only cache misses to the underlying client"""
+        keys = [self.cache.make_key(self.model_name, "document", text) for text in texts]
+        vectors = [self.cache.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embedded = self.embedder.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, embedded):
+                self.cache.put(keys[i], vector)
+                vectors[i] = vector
+        return vectors
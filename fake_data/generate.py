@@ -0,0 +1,351 @@
+"""Deterministic bulk data generator for the quick-commerce platform databases.
+
+Creates the shared 15-table schema in each platform database and loads it
+with PostgreSQL COPY from in-memory buffers. Rows are generated column-wise
+with NumPy from small Faker vocabularies, so the size of the data is set by
+``--scale`` (1 reproduces the original 50 products / 20 users) and the
+content by ``--seed``. Platforms are loaded in parallel processes.
+
+    python fake_data/generate.py --scale 1000 --seed 7
+"""
+import argparse
+import io
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import psycopg2
+from faker import Faker
+
+PLATFORMS = ["blinkit_db", "zepto_db", "instamart_db", "bigbasket_db"]
+COPY_CHUNK_ROWS = 100_000
+
+SCHEMA_SQL = """
+-- 1. Category
+CREATE TABLE category (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) UNIQUE
+);
+
+-- 2. Brand
+CREATE TABLE brand (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) UNIQUE
+);
+
+-- 3. Unit
+CREATE TABLE unit (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(50),
+    abbreviation VARCHAR(10)
+);
+
+-- 4. Product
+CREATE TABLE product (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255),
+    category_id INTEGER REFERENCES category(id),
+    brand_id INTEGER REFERENCES brand(id),
+    unit_id INTEGER REFERENCES unit(id)
+);
+
+-- 5. Price
+CREATE TABLE price (
+    id SERIAL PRIMARY KEY,
+    product_id INTEGER REFERENCES product(id),
+    price NUMERIC(10,2),
+    effective_from TIMESTAMP
+);
+
+-- 6. Discount
+CREATE TABLE discount (
+    id SERIAL PRIMARY KEY,
+    product_id INTEGER REFERENCES product(id),
+    discount_percent NUMERIC(5,2),
+    start_date DATE,
+    end_date DATE
+);
+
+-- 7. Inventory
+CREATE TABLE inventory (
+    id SERIAL PRIMARY KEY,
+    product_id INTEGER REFERENCES product(id),
+    quantity INTEGER,
+    updated_at TIMESTAMP
+);
+
+-- 8. City
+CREATE TABLE city (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100)
+);
+
+-- 9. Warehouse
+CREATE TABLE warehouse (
+    id SERIAL PRIMARY KEY,
+    city_id INTEGER REFERENCES city(id),
+    address TEXT
+);
+
+-- 10. User
+CREATE TABLE app_user (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100),
+    email VARCHAR(100) UNIQUE,
+    city_id INTEGER REFERENCES city(id)
+);
+
+-- 11. Address
+CREATE TABLE user_address (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES app_user(id),
+    address TEXT
+);
+
+-- 12. Order
+CREATE TABLE app_order (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES app_user(id),
+    warehouse_id INTEGER REFERENCES warehouse(id),
+    order_time TIMESTAMP,
+    status VARCHAR(50)
+);
+
+-- 13. OrderItem
+CREATE TABLE order_item (
+    id SERIAL PRIMARY KEY,
+    order_id INTEGER REFERENCES app_order(id),
+    product_id INTEGER REFERENCES product(id),
+    quantity INTEGER,
+    price_at_purchase NUMERIC(10,2)
+);
+
+-- 14. DeliverySlot
+CREATE TABLE delivery_slot (
+    id SERIAL PRIMARY KEY,
+    start_time TIME,
+    end_time TIME
+);
+
+-- 15. Delivery
+CREATE TABLE delivery (
+    id SERIAL PRIMARY KEY,
+    order_id INTEGER REFERENCES app_order(id),
+    delivery_slot_id INTEGER REFERENCES delivery_slot(id),
+    delivered_at TIMESTAMP
+);
+"""
+
+
+def _clean(text: str) -> str:
+    """Make Faker text safe for COPY's text format"""
+    return text.replace("\\", " ").replace("\t", " ").replace("\r", " ").replace("\n", ", ")
+
+
+def _unique_names(pool: list, n: int) -> np.ndarray:
+    """n unique names cycling through pool, numbered once the pool runs out"""
+    base = np.array(pool, dtype=object)[np.arange(n) % len(pool)]
+    rounds = np.arange(n) // len(pool)
+    return np.array([name if r == 0 else f"{name} {r + 1}" for name, r in zip(base, rounds)], dtype=object)
+
+
+def _timestamps(rng, as_of: datetime, n: int, max_age: timedelta) -> np.ndarray:
+    offsets = rng.integers(0, int(max_age.total_seconds()), size=n)
+    return np.datetime64(as_of, "s") - offsets.astype("timedelta64[s]")
+
+
+def _ids(n: int) -> np.ndarray:
+    return np.arange(1, n + 1)
+
+
+def generate_tables(scale: float = 1.0, seed: int = 42, platform_index: int = 0, as_of: datetime = None):
+    """Yield ``(table, columns, arrays)`` for every table in foreign-key order.
+
+    Each array holds one column for all rows. The same scale, seed,
+    platform index and as-of time always produce the same data.
+    """
+    as_of = as_of or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    rng = np.random.default_rng([seed, platform_index])
+    fake = Faker()
+    fake.seed_instance(seed * 1000 + platform_index)
+
+    words = sorted({fake.word().capitalize() for _ in range(2000)})
+    companies = sorted({_clean(fake.company()) for _ in range(500)})
+    city_pool = sorted({_clean(fake.city()) for _ in range(500)})
+    people = [_clean(fake.name()) for _ in range(2000)]
+    addresses = [_clean(fake.address()) for _ in range(2000)]
+
+    n_categories = max(10, int(10 * math.sqrt(scale)))
+    n_brands = max(10, int(10 * scale))
+    n_cities = max(5, int(5 * math.sqrt(scale)))
+    n_products = max(1, int(50 * scale))
+    n_warehouses = max(1, int(5 * scale))
+    n_users = max(1, int(20 * scale))
+
+    yield "category", ["id", "name"], [_ids(n_categories), _unique_names(words, n_categories)]
+    yield "brand", ["id", "name"], [_ids(n_brands), _unique_names(companies, n_brands)]
+    units = [("Kilogram", "kg"), ("Gram", "g"), ("Litre", "L"), ("Piece", "pc"), ("Pack", "pk")]
+    yield "unit", ["id", "name", "abbreviation"], [
+        _ids(len(units)), np.array([u[0] for u in units], dtype=object), np.array([u[1] for u in units], dtype=object)
+    ]
+    yield "city", ["id", "name"], [_ids(n_cities), _unique_names(city_pool, n_cities)]
+
+    word_array = np.array(words, dtype=object)
+    product_names = word_array[rng.integers(0, len(words), n_products)] + " " + word_array[rng.integers(0, len(words), n_products)]
+    yield "product", ["id", "name", "category_id", "brand_id", "unit_id"], [
+        _ids(n_products), product_names,
+        rng.integers(1, n_categories + 1, n_products),
+        rng.integers(1, n_brands + 1, n_products),
+        rng.integers(1, len(units) + 1, n_products),
+    ]
+
+    product_ids = _ids(n_products)
+    yield "price", ["id", "product_id", "price", "effective_from"], [
+        _ids(n_products), product_ids,
+        np.round(rng.uniform(10, 500, n_products), 2),
+        _timestamps(rng, as_of, n_products, timedelta(days=30)),
+    ]
+
+    n_discounts = n_products // 2
+    starts = np.datetime64(as_of.date(), "D") - rng.integers(1, 16, n_discounts).astype("timedelta64[D]")
+    yield "discount", ["id", "product_id", "discount_percent", "start_date", "end_date"], [
+        _ids(n_discounts), rng.choice(product_ids, n_discounts, replace=False),
+        np.round(rng.uniform(5, 40, n_discounts), 2),
+        starts, starts + rng.integers(1, 11, n_discounts).astype("timedelta64[D]"),
+    ]
+
+    yield "inventory", ["id", "product_id", "quantity", "updated_at"], [
+        _ids(n_products), product_ids,
+        rng.integers(0, 101, n_products),
+        np.full(n_products, np.datetime64(as_of, "s")),
+    ]
+
+    address_array = np.array(addresses, dtype=object)
+    yield "warehouse", ["id", "city_id", "address"], [
+        _ids(n_warehouses), rng.integers(1, n_cities + 1, n_warehouses),
+        address_array[rng.integers(0, len(addresses), n_warehouses)],
+    ]
+
+    user_ids = _ids(n_users)
+    emails = np.array([f"user{i}@example.com" for i in user_ids], dtype=object)
+    yield "app_user", ["id", "name", "email", "city_id"], [
+        user_ids, np.array(people, dtype=object)[rng.integers(0, len(people), n_users)],
+        emails, rng.integers(1, n_cities + 1, n_users),
+    ]
+    yield "user_address", ["id", "user_id", "address"], [
+        _ids(n_users), user_ids, address_array[rng.integers(0, len(addresses), n_users)],
+    ]
+
+    order_user_ids = np.repeat(user_ids, rng.integers(1, 4, n_users))
+    n_orders = len(order_user_ids)
+    statuses = np.array(["placed", "packed", "dispatched", "delivered"], dtype=object)
+    yield "app_order", ["id", "user_id", "warehouse_id", "order_time", "status"], [
+        _ids(n_orders), order_user_ids,
+        rng.integers(1, n_warehouses + 1, n_orders),
+        _timestamps(rng, as_of, n_orders, timedelta(days=10)),
+        statuses[rng.integers(0, len(statuses), n_orders)],
+    ]
+
+    item_order_ids = np.repeat(_ids(n_orders), rng.integers(1, 6, n_orders))
+    n_items = len(item_order_ids)
+    yield "order_item", ["id", "order_id", "product_id", "quantity", "price_at_purchase"], [
+        _ids(n_items), item_order_ids,
+        rng.integers(1, n_products + 1, n_items),
+        rng.integers(1, 6, n_items),
+        np.round(rng.uniform(10, 500, n_items), 2),
+    ]
+
+    hours = np.arange(8, 20)
+    yield "delivery_slot", ["id", "start_time", "end_time"], [
+        _ids(len(hours)),
+        np.array([f"{h:02}:00" for h in hours], dtype=object),
+        np.array([f"{h + 1:02}:00" for h in hours], dtype=object),
+    ]
+
+    n_deliveries = int(n_orders * 0.7)
+    yield "delivery", ["id", "order_id", "delivery_slot_id", "delivered_at"], [
+        _ids(n_deliveries),
+        np.sort(rng.choice(_ids(n_orders), n_deliveries, replace=False)),
+        rng.integers(1, len(hours) + 1, n_deliveries),
+        _timestamps(rng, as_of, n_deliveries, timedelta(hours=48)),
+    ]
+
+
+def _as_text(array: np.ndarray) -> list:
+    """Render a column as COPY text values"""
+    if np.issubdtype(array.dtype, np.datetime64):
+        return np.datetime_as_string(array).tolist()
+    if np.issubdtype(array.dtype, np.floating):
+        return [f"{value:.2f}" for value in array.tolist()]
+    return [str(value) for value in array.tolist()]
+
+
+def _copy_table(cur, table: str, columns: list, arrays: list) -> int:
+    """COPY one table from in-memory TSV buffers, COPY_CHUNK_ROWS rows at a time"""
+    n_rows = len(arrays[0])
+    for start in range(0, n_rows, COPY_CHUNK_ROWS):
+        chunk = [_as_text(array[start:start + COPY_CHUNK_ROWS]) for array in arrays]
+        buffer = io.StringIO("\n".join(map("\t".join, zip(*chunk))) + "\n")
+        cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+    # Explicit ids were loaded, so move the SERIAL sequence past them
+    cur.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST(MAX(id), 1)) FROM {table}")
+    return n_rows
+
+
+def load_platform(db_name: str, scale: float = 1.0, seed: int = 42, as_of: datetime = None) -> list:
+    """Recreate one platform database and load it; returns (table, rows, seconds) per table"""
+    conn = psycopg2.connect(
+        dbname=db_name,
+        user=os.getenv("PGUSER", "postgres"),
+        password=os.getenv("PGPASSWORD", "12345678"),
+        host=os.getenv("PGHOST", "localhost"),
+        port=os.getenv("PGPORT", "5432"),
+    )
+    cur = conn.cursor()
+    cur.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public;")
+    cur.execute(SCHEMA_SQL)
+    conn.commit()
+
+    stats = []
+    platform_index = PLATFORMS.index(db_name) if db_name in PLATFORMS else len(PLATFORMS)
+    for table, columns, arrays in generate_tables(scale, seed, platform_index, as_of):
+        start = time.perf_counter()
+        rows = _copy_table(cur, table, columns, arrays)
+        conn.commit()
+        stats.append((table, rows, time.perf_counter() - start))
+
+    cur.execute("ANALYZE")
+    conn.commit()
+    cur.close()
+    conn.close()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate fake quick-commerce data")
+    parser.add_argument("--scale", type=float, default=1.0, help="1 = 50 products and 20 users per platform")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--platforms", nargs="+", default=PLATFORMS)
+    parser.add_argument("--processes", type=int, default=None, help="defaults to one per platform")
+    args = parser.parse_args(argv)
+
+    as_of = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    with ProcessPoolExecutor(max_workers=args.processes or len(args.platforms)) as pool:
+        futures = {
+            db_name: pool.submit(load_platform, db_name, args.scale, args.seed, as_of)
+            for db_name in args.platforms
+        }
+        for db_name, future in futures.items():
+            stats = future.result()
+            total_rows = sum(rows for _, rows, _ in stats)
+            total_time = sum(seconds for _, _, seconds in stats)
+            for table, rows, seconds in stats:
+                print(f"{db_name}: {table:<14} {rows:>12,} rows  {rows / seconds if seconds else 0:>12,.0f} rows/sec")
+            print(f"✅ {db_name}: {total_rows:,} rows in {total_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+import contextvars
+from contextlib import contextmanager
+from sqlalchemy import inspect
+from langchain_community.utilities import SQLDatabase
+from langchain_community.utilities.sql_database import truncate_word
+from bounded_sql import format_bounded
+from result_cache import cached_execute_bounded
+from schema_prompt import SCHEMA_TOKEN_BUDGET, compact_schema, count_tokens, current_question, table_spec
+from tracing import metrics, span
+
+SCHEMA_INFO_TTL_S = float(os.getenv("SCHEMA_INFO_TTL_S", "3600"))
+
+# Bounded results of the query tool's runs, keyed by SQL, while an agent runs
+# inside capture_tool_results; the tool runs in worker threads that copy the context
+_tool_results = contextvars.ContextVar("tool_results", default=None)
+
+
+@contextmanager
+def capture_tool_results():
+    """Collect the bounded result of every query run through ``FilteredSQLDatabase.run`` in this block"""
+    results = {}
+    token = _tool_results.set(results)
+    try:
+        yield results
+    finally:
+        _tool_results.reset(token)
+
+
+class SchemaInfoCache:
+    """Per-table schema data shared by all agents of a database.
+
+    ``kind`` separates the cached schema text (DDL plus sample rows) from
+    other per-table data such as column names.
+    """
+
+    def __init__(self, ttl: float = SCHEMA_INFO_TTL_S):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, db_name: str, table_name: str, compute, kind: str = "info"):
+        key = (db_name, table_name, kind)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[1]:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        info = compute()
+        with self._lock:
+            self._entries[key] = (info, time.monotonic() + self.ttl)
+        return info
+
+    def invalidate(self, db_name: str = None, table_name: str = None):
+        """Drop one table, every table of a database, or everything"""
+        with self._lock:
+            for key in list(self._entries):
+                if (db_name is None or key[0] == db_name) and (table_name is None or key[1] == table_name):
+                    del self._entries[key]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+schema_info_cache = SchemaInfoCache()
+
+
+class FilteredSQLDatabase(SQLDatabase):
+    """SQLDatabase that only describes the tables picked by retrieval.
+
+    Table info is served from ``schema_info_cache``, so schema lookups by
+    the agent only reflect tables and sample rows the first time any agent
+    for this database asks for them. Queries go through ``execute_bounded``
+    so the agent never pulls a whole table into memory or its prompt.
+
+    Table info longer than ``schema_token_budget`` tokens is compacted
+    around the question in ``schema_prompt.current_question``.
+    """
+
+    def __init__(self, engine, db_name: str, table_names, schema_token_budget: int = SCHEMA_TOKEN_BUDGET,
+                 **kwargs):
+        super().__init__(engine, lazy_table_reflection=True, **kwargs)
+        self.db_name = db_name
+        self.filtered_tables = list(table_names)
+        self.schema_token_budget = schema_token_budget
+        # Lazy reflection into the shared MetaData is not thread-safe
+        self._reflect_lock = threading.Lock()
+
+    def _compute_table_info(self, table_name: str) -> str:
+        with self._reflect_lock:
+            return super().get_table_info([table_name])
+
+    def get_table_info(self, table_names=None):
+        # The schema tool may ask for a subset; anything outside the filter is ignored
+        tables = [t for t in (table_names or []) if t in self.filtered_tables] or self.filtered_tables
+        full = "\n\n".join(
+            schema_info_cache.get_or_compute(
+                self.db_name, table_name,
+                lambda table_name=table_name: self._compute_table_info(table_name)
+            )
+            for table_name in tables
+        )
+        if not self.schema_token_budget:
+            return full
+        with span("schema_prompt", db=self.db_name, tables=len(tables)) as current:
+            tokens_before = count_tokens(full)
+            info = full
+            if tokens_before > self.schema_token_budget:
+                specs = [
+                    schema_info_cache.get_or_compute(
+                        self.db_name, table_name,
+                        lambda table_name=table_name: table_spec(self._engine, table_name),
+                        kind="spec"
+                    )
+                    for table_name in tables
+                ]
+                info = compact_schema(specs, current_question.get(), self.schema_token_budget)
+            tokens_after = count_tokens(info) if info is not full else tokens_before
+            current.update(tokens_before=tokens_before, tokens_after=tokens_after)
+        metrics.inc("sql_agents_schema_tokens_total", tokens_before, stage="before")
+        metrics.inc("sql_agents_schema_tokens_total", tokens_after, stage="after")
+        return info
+
+    def get_table_columns(self) -> dict:
+        """Column names of the filtered tables, from the schema cache"""
+        return {
+            table_name: schema_info_cache.get_or_compute(
+                self.db_name, table_name,
+                lambda table_name=table_name: [col["name"] for col in inspect(self._engine).get_columns(table_name)],
+                kind="columns"
+            )
+            for table_name in self.filtered_tables
+        }
+
+    def execute_bounded(self, sql: str, **kwargs) -> dict:
+        """Run SQL under the row and byte caps, served from the result cache when unchanged"""
+        return cached_execute_bounded(self._engine, self.db_name, sql, self.dialect, **kwargs)
+
+    def run(self, command, fetch="all", include_columns=False, **kwargs):
+        # Only plain-text "fetch all" queries are bounded. The query tool goes through
+        # run_no_throw, which always passes parameters=None and execution_options=None.
+        if fetch != "all" or not isinstance(command, str) or kwargs.get("parameters") \
+                or kwargs.get("execution_options"):
+            return super().run(command, fetch, include_columns, **kwargs)
+        result = self.execute_bounded(command)
+        captured = _tool_results.get()
+        if captured is not None:
+            captured[command] = dict(result)
+        result["rows"] = [
+            tuple(truncate_word(value, length=self._max_string_length) for value in row)
+            for row in result["rows"]
+        ]
+        if include_columns:
+            result["rows"] = [dict(zip(result["columns"], row)) for row in result["rows"]]
+        return format_bounded(result)
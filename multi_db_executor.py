@@ -1,14 +1,25 @@
 import os
+import time
+import atexit
+import hashlib
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from functools import lru_cache
-from sqlalchemy import create_engine
-from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
-from pinecone import Pinecone
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
-from langchain_community.agent_toolkits.sql.base import create_sql_agent
-from langchain_community.utilities import SQLDatabase
-from langchain_openai import ChatOpenAI
+from db_pools import create_pooled_engine
+from embedding_cache import CachedEmbeddings
+from bounded_sql import format_bounded
+from name_index import get_name_index, format_entity_hints, format_store_hints
+from plan_cache import PlanCache
+from price_store import PRICE_STORE_DB, get_store_engine, platform_price, should_route
+from resources import LazyEngines, TableSetUsage, registry
+from result_cache import cached_execute_bounded
+from schema_prompt import question_context
+from sql_generation import build_sql_prompt, build_repair_prompt, extract_sql, validate_sql
+from table_retrieval import candidate_count, hybrid_tables
+from tracing import span, llm_callback
+import vector_store
 
 load_dotenv()
 
@@ -16,63 +27,155 @@ load_dotenv()
 os.environ["GOOGLE_API_KEY"] = os.getenv("GEMINI_API_KEY")
 os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
 
-# Initialize once
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-embedder = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-index = pc.Index("multi-db-index")
-
-# Database URLs with connection pooling
-DB_ENGINES = {
-    db: create_engine(
-        url, 
-        poolclass=QueuePool,
-        pool_size=5,
-        max_overflow=10,
-        pool_pre_ping=True,
-        pool_recycle=3600
-    )
-    for db, url in {
-        "blinkit_db": os.getenv("blinkit_db_url"),
-        "zepto_db": os.getenv("zepto_db_url"), 
-        "instamart_db": os.getenv("instamart_db_url"),
-        "bigbasket_db": os.getenv("bigbasket_db_url")
-    }.items()
-}
+EMBEDDING_MODEL = "models/embedding-001"
+# Whether the app warms up in the background on start, and how many
+# agents warm_up pre-builds (most used table sets first)
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "1") == "1"
+WARMUP_AGENTS = int(os.getenv("WARMUP_AGENTS", "8"))
+
+# Clients are built on first use (see resources.py); the LangChain,
+# OpenAI and Gemini packages are only imported then
+def _build_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model="gpt-4o-mini", temperature=0)
+
+def _build_embedder():
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    return CachedEmbeddings(GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_MODEL)
+
+registry.register("llm", _build_llm)
+registry.register("embedder", _build_embedder)
+registry.register("table_store", vector_store.get_table_store)
+
+def get_llm():
+    return registry.get("llm")
+
+def get_embedder():
+    return registry.get("embedder")
+
+def get_table_store():
+    return registry.get("table_store")
+
+def __getattr__(name: str):
+    # Module attributes kept for callers of the old eager globals
+    if name in ("llm", "embedder", "table_store"):
+        return registry.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+plan_cache = PlanCache()
+table_set_usage = TableSetUsage()
+atexit.register(table_set_usage.flush)
+
+# Database URLs with connection pooling; each engine is created on first use,
+# with the pool settings of db_pools.pool_settings
+DB_ENGINES = LazyEngines({
+    "blinkit_db": os.getenv("blinkit_db_url"),
+    "zepto_db": os.getenv("zepto_db_url"),
+    "instamart_db": os.getenv("instamart_db_url"),
+    "bigbasket_db": os.getenv("bigbasket_db_url")
+}, create_pooled_engine)
+
+# Concurrency settings for run_multi_db_query
+MAX_WORKERS = int(os.getenv("MULTI_DB_MAX_WORKERS", "4"))
+DB_TIMEOUT_S = float(os.getenv("MULTI_DB_TIMEOUT_S", "60"))
+REQUEST_TIMEOUT_S = float(os.getenv("MULTI_DB_REQUEST_TIMEOUT_S", "90"))
+# Generate SQL once for databases whose relevant tables have identical schemas
+SHARED_PLAN = os.getenv("MULTI_DB_SHARED_PLAN", "0") == "1"
+# "agent" (ReAct tool loop) or "single_shot" (one prompt, local validation, one repair)
+EXECUTION_MODE = os.getenv("MULTI_DB_EXECUTION_MODE", "agent")
+
+@lru_cache(maxsize=32)
+def get_cached_database(db_name: str, table_names_tuple: tuple):
+    """Create and cache a SQLDatabase limited to the given tables"""
+    from filtered_sql_database import FilteredSQLDatabase
+    return FilteredSQLDatabase(DB_ENGINES[db_name], db_name, table_names_tuple)
 
 # Cache SQL agents to avoid recreation
 @lru_cache(maxsize=32)
 def get_cached_agent(db_name: str, table_names_tuple: tuple):
     """Create and cache SQL agents with filtered tables"""
-    class FilteredSQLDatabase(SQLDatabase):
-        def __init__(self, engine):
-            super().__init__(engine)
-            self.filtered_tables = list(table_names_tuple)
-            
-        def get_table_info(self, table_names=None):
-            return super().get_table_info(table_names=self.filtered_tables)
-
-    db = FilteredSQLDatabase(DB_ENGINES[db_name])
+    from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
+    from langchain_community.agent_toolkits.sql.base import create_sql_agent
+
+    llm = get_llm()
+    db = get_cached_database(db_name, table_names_tuple)
     toolkit = SQLDatabaseToolkit(db=db, llm=llm)
     return create_sql_agent(
         llm=llm, 
         toolkit=toolkit, 
         verbose=True, 
         handle_parsing_errors=True,
-        agent_executor_kwargs={"handle_parsing_errors": True}
+        agent_executor_kwargs={"handle_parsing_errors": True, "return_intermediate_steps": True}
     )
 
+def get_agent(db_name: str, table_names: list):
+    """get_cached_agent, traced as agent creation with its cache outcome"""
+    table_set_usage.record(db_name, tuple(table_names))
+    with span("agent_create", db=db_name) as current:
+        misses = get_cached_agent.cache_info().misses
+        agent = get_cached_agent(db_name, tuple(table_names))
+        current["cache"] = "miss" if get_cached_agent.cache_info().misses > misses else "hit"
+    return agent
+
 def get_relevant_tables(query: str, top_k: int = 5):
-    """Get relevant tables using vector similarity search"""
-    query_vec = embedder.embed_query(query)
-    matches = index.query(vector=query_vec, top_k=top_k, include_metadata=True)
-    return matches["matches"]
-
-def run_multi_db_query(query: str, relevant_tables: list):
-    """Execute query across relevant databases concurrently"""
-    responses = []
-    
-    # Group tables by database
+    """Get relevant tables: vector similarity fused with BM25 over names, plus the tables joining them"""
+    with span("embed"):
+        query_vec = get_embedder().embed_query(query)
+    with span("vector_search", top_k=top_k):
+        matches = get_table_store().query(query_vec, top_k=candidate_count(top_k))
+    return hybrid_tables(query, matches, top_k, get_table_store().get_metadata)
+
+_warm_up_started = False
+_warm_up_lock = threading.Lock()
+
+def warm_up(background: bool = True, agents: int = None):
+    """Build the shared clients, pre-connect every engine and pre-build the most used agents.
+
+    Runs once per process. With ``background`` it returns the daemon
+    thread doing the work; the first question then only waits for
+    whatever is not ready yet.
+    """
+    global _warm_up_started
+    with _warm_up_lock:
+        if _warm_up_started:
+            return None
+        _warm_up_started = True
+    if background:
+        thread = threading.Thread(target=_warm_up, args=(agents,), name="warm-up", daemon=True)
+        thread.start()
+        return thread
+    _warm_up(agents)
+
+def _warm_up(agents: int = None):
+    agents = WARMUP_AGENTS if agents is None else agents
+    start = time.perf_counter()
+    with span("warm_up") as current:
+        for name in ("llm", "embedder", "table_store"):
+            try:
+                registry.get(name)
+            except Exception as e:
+                print(f"Warm-up could not build {name}: {e}")
+        for db_name in DB_ENGINES:
+            try:
+                # Leaves one pooled connection open for the first query
+                with DB_ENGINES[db_name].connect():
+                    pass
+            except Exception as e:
+                print(f"Warm-up could not connect to {db_name}: {e}")
+        built = 0
+        for db_name, table_names in table_set_usage.most_common(agents):
+            if db_name not in DB_ENGINES:
+                continue
+            try:
+                get_cached_agent(db_name, table_names)
+                built += 1
+            except Exception as e:
+                print(f"Warm-up could not build the {db_name} agent for {table_names}: {e}")
+        current["agents"] = built
+    print(f"✅ Warm-up done in {time.perf_counter() - start:.2f}s ({built} agents pre-built)")
+
+def group_tables_by_db(relevant_tables: list) -> dict:
+    """Group matched tables by database, keeping first-seen (relevance) order"""
     db_tables = {}
     for match in relevant_tables:
         db_name = match['metadata']['db']
@@ -80,24 +183,370 @@ def run_multi_db_query(query: str, relevant_tables: list):
         if db_name not in db_tables:
             db_tables[db_name] = []
         db_tables[db_name].append(table_name)
-    
-    print(f"Querying {len(db_tables)} databases with {len(relevant_tables)} relevant tables")
-    
-    # Process each database with relevant tables
-    for db_name, table_names in db_tables.items():
+    return db_tables
+
+def _combine_fingerprints(parts: list) -> str:
+    return hashlib.sha256("|".join(sorted(parts)).encode()).hexdigest()[:16]
+
+def schema_fingerprints(relevant_tables: list) -> dict:
+    """Combined schema fingerprint of the matched tables, per database"""
+    parts = {}
+    for match in relevant_tables:
+        meta = match['metadata']
+        parts.setdefault(meta['db'], []).append(f"{meta['table']}:{meta.get('fingerprint', '')}")
+    return {db_name: _combine_fingerprints(db_parts) for db_name, db_parts in parts.items()}
+
+def shared_plan_groups(db_tables: dict):
+    """Find databases that can share one generated SQL statement.
+
+    Takes the union of relevant tables across databases and groups the
+    databases in which every one of those tables exists with the same
+    schema fingerprint. Returns ``(union_tables, groups)`` where each group
+    is ``(fingerprint, [db_name, ...])`` with at least two databases.
+    """
+    union = sorted({table for tables in db_tables.values() for table in tables})
+    metadata = get_table_store().get_metadata([f"{db}:{table}" for db in db_tables for table in union])
+    groups = {}
+    for db_name in db_tables:
+        table_fps = [metadata.get(f"{db_name}:{table}", {}).get("fingerprint") for table in union]
+        if all(table_fps):
+            fingerprint = _combine_fingerprints([f"{t}:{fp}" for t, fp in zip(union, table_fps)])
+            groups.setdefault(fingerprint, []).append(db_name)
+    return union, [(fp, members) for fp, members in groups.items() if len(members) > 1]
+
+def extract_executed_sql(result: dict):
+    """Last successful sql_db_query input from an agent run, if any"""
+    for action, observation in reversed(result.get("intermediate_steps", [])):
+        if action.tool == "sql_db_query" and not str(observation).startswith("Error"):
+            tool_input = action.tool_input
+            return tool_input.get("query") if isinstance(tool_input, dict) else tool_input
+    return None
+
+def sql_answer(result: dict, sql: str, **extra) -> dict:
+    """Answer dict for SQL run outside the agent, carrying the bounded rows"""
+    return {"output": format_bounded(result), "sql": sql, "columns": result["columns"],
+            "rows": result["rows"], "truncated": result["truncated"],
+            "total_rows": result["total_rows"], **extra}
+
+def with_rows(answer: dict, result: dict) -> dict:
+    """Add the columns and typed rows of the SQL an agent ran to its free-text answer"""
+    return {**answer, "columns": result["columns"], "rows": result["rows"],
+            "truncated": result["truncated"], "total_rows": result["total_rows"]}
+
+def run_sql(db_name: str, sql: str) -> dict:
+    """Execute SQL directly under the row and byte caps, through the result cache"""
+    return cached_execute_bounded(DB_ENGINES[db_name], db_name, sql)
+
+def plan_fingerprint(fingerprint: str, hints: bool = True) -> str:
+    """Plan cache fingerprint: the schema fingerprint plus, with hints, the name index generation.
+
+    SQL generated with entity hints filters on ids resolved from one
+    version of the name index, so a refreshed index must not replay it.
+    """
+    if not hints:
+        return fingerprint
+    return _combine_fingerprints([fingerprint or "", f"names:{get_name_index().generation}"])
+
+def question_with_hints(db_name: str, table_names: list, query: str) -> str:
+    """Append the ids of products, brands and categories named in the question.
+
+    Ids are resolved per platform by the name index, so the model can
+    filter on primary keys instead of guessing ILIKE patterns.
+    """
+    with span("entity_resolve", db=db_name) as current:
+        index = get_name_index()
+        if not len(index):
+            return query
+        if db_name == PRICE_STORE_DB:
+            hints = format_store_hints(index.resolve(query))
+        else:
+            hints = format_entity_hints(index.resolve(query, platforms={db_name}).get(db_name, {}), table_names)
+        current["resolved"] = bool(hints)
+    return f"{query}\n\n{hints}" if hints else query
+
+def _generate_with_agent(db_name: str, table_names: list, query: str, hints: bool = True) -> dict:
+    from filtered_sql_database import capture_tool_results
+    agent = get_agent(db_name, table_names)
+    question = question_with_hints(db_name, table_names, query) if hints else query
+    # The schema tool compacts table info around the original question
+    with question_context(query), capture_tool_results() as tool_results:
+        result = agent.invoke({"input": question}, config={"callbacks": [llm_callback]})
+    answer = {
+        "output": result.get("output", result),
+        "sql": extract_executed_sql(result),
+        # One LLM call per tool step plus the final answer
+        "llm_calls": len(result.get("intermediate_steps", [])) + 1,
+    }
+    # Rows come from the query tool's own run of the final SQL, not a second query
+    if answer["sql"] in tool_results:
+        answer = with_rows(answer, tool_results[answer["sql"]])
+    return answer
+
+def _generate_single_shot(db_name: str, table_names: list, query: str, db=None, hints: bool = True) -> dict:
+    """Generate SQL with one prompt, validate it locally and allow one repair round trip"""
+    db = db or get_cached_database(db_name, tuple(table_names))
+    question = question_with_hints(db_name, table_names, query) if hints else query
+    with question_context(query):
+        table_info = db.get_table_info()
+    prompt = build_sql_prompt(db.dialect, table_info, question)
+    llm = get_llm()
+    sql = extract_sql(llm.invoke(prompt, config={"callbacks": [llm_callback]}).content)
+    llm_calls = 1
+    while True:
         try:
-            # Use cached agent with table names as tuple for hashing
-            agent = get_cached_agent(db_name, tuple(table_names))
-            result = agent.invoke({"input": query})
-            output = result.get("output", result)
-            responses.append((db_name, output))
-            print(f"✓ {db_name}: Success")
+            validate_sql(sql, db.get_table_columns(), db.dialect)
+            return sql_answer(db.execute_bounded(sql), sql, llm_calls=llm_calls)
         except Exception as e:
-            error_msg = f"Error: {str(e)}"
-            responses.append((db_name, error_msg))
-            print(f"✗ {db_name}: {error_msg}")
-    
-    return responses
+            if llm_calls > 1:
+                raise
+            print(f"Repairing SQL for {db_name}: {e}")
+            sql = extract_sql(llm.invoke(build_repair_prompt(prompt, sql, e),
+                                         config={"callbacks": [llm_callback]}).content)
+            llm_calls += 1
+
+def _answer_db(db_name: str, table_names: list, fingerprint: str, query: str, mode: str,
+               hints: bool = True) -> dict:
+    """Answer for one database.
+
+    Serves repeat questions from the plan cache by running the cached SQL
+    directly; SQL is only generated (by the agent or single-shot) on a miss
+    or if the cached SQL fails. ``hints=False`` leaves out the
+    platform-specific entity ids, for SQL that other databases will reuse.
+    """
+    key = plan_cache.make_key(db_name, table_names, query)
+    fingerprint = plan_fingerprint(fingerprint, hints)
+    cached_sql = plan_cache.get(key, fingerprint)
+    if cached_sql is not None:
+        try:
+            return sql_answer(run_sql(db_name, cached_sql), cached_sql, plan_cache="hit", llm_calls=0)
+        except Exception as e:
+            print(f"Cached SQL failed on {db_name}, regenerating: {e}")
+            plan_cache.invalidate(key=key)
+
+    if mode == "single_shot":
+        answer = _generate_single_shot(db_name, table_names, query, hints=hints)
+    else:
+        answer = _generate_with_agent(db_name, table_names, query, hints=hints)
+    if answer["sql"]:
+        plan_cache.put(key, answer["sql"], fingerprint)
+    answer["plan_cache"] = "miss"
+    return answer
+
+@lru_cache(maxsize=1)
+def get_price_store_database():
+    """SQLDatabase over the unified price store built by price_store.py"""
+    from filtered_sql_database import FilteredSQLDatabase
+    return FilteredSQLDatabase(get_store_engine(), PRICE_STORE_DB, [platform_price.name])
+
+def _answer_price_store(query: str) -> dict:
+    """Answer a price-comparison question with one query over the unified price store"""
+    db = get_price_store_database()
+    key = plan_cache.make_key(PRICE_STORE_DB, [platform_price.name], query)
+    fingerprint = plan_fingerprint(None)
+    cached_sql = plan_cache.get(key, fingerprint)
+    if cached_sql is not None:
+        try:
+            return sql_answer(db.execute_bounded(cached_sql), cached_sql, plan_cache="hit", llm_calls=0)
+        except Exception as e:
+            print(f"Cached SQL failed on {PRICE_STORE_DB}, regenerating: {e}")
+            plan_cache.invalidate(key=key)
+    answer = _generate_single_shot(PRICE_STORE_DB, [platform_price.name], query, db=db)
+    plan_cache.put(key, answer["sql"], fingerprint)
+    answer["plan_cache"] = "miss"
+    return answer
+
+def price_store_result(query: str) -> dict:
+    """Result dict for a question routed to the price store, shaped like a per-database result"""
+    start = time.monotonic()
+    try:
+        with span("db_answer", db=PRICE_STORE_DB) as current:
+            result = {"status": "ok", **_answer_price_store(query)}
+            current.update(plan_cache=result["plan_cache"], llm_calls=result["llm_calls"])
+    except Exception as e:
+        result = {"status": "error", "output": f"Error: {str(e)}"}
+    elapsed = time.monotonic() - start
+    if result["status"] == "ok":
+        print(f"✓ {PRICE_STORE_DB}: Success ({elapsed:.1f}s, {result['llm_calls']} LLM calls, "
+              f"plan cache {result['plan_cache']})")
+    else:
+        print(f"✗ {PRICE_STORE_DB}: {result['output']}")
+    return {"db": PRICE_STORE_DB, "elapsed": elapsed, **result}
+
+def _answer_with_shared_plan(db_name: str, leader: str, leader_future, table_names: list,
+                             fingerprint: str, query: str, mode: str) -> dict:
+    """Run the SQL generated for ``leader`` on this database, falling back to its own generation"""
+    try:
+        sql = leader_future.result().get("sql")
+    except Exception:
+        sql = None
+    if sql:
+        try:
+            return sql_answer(run_sql(db_name, sql), sql, plan_cache="shared",
+                              shared_from=leader, llm_calls=0)
+        except Exception as e:
+            print(f"Shared SQL from {leader} failed on {db_name}, generating its own: {e}")
+    return _answer_db(db_name, table_names, fingerprint, query, mode)
+
+def _timed(db_name: str, started: dict, finished: dict, answer, *args) -> dict:
+    """Call ``answer`` recording this database's start/finish times"""
+    started[db_name] = time.monotonic()
+    try:
+        with span("db_answer", db=db_name) as current:
+            result = answer(*args)
+            current.update(plan_cache=result.get("plan_cache"), llm_calls=result.get("llm_calls"))
+            return result
+    finally:
+        finished[db_name] = time.monotonic()
+
+def _build_result(db_name: str, future, timed_out: set, started: dict, finished: dict,
+                  request_started: float) -> dict:
+    end = finished.get(db_name, time.monotonic())
+    # A job no worker picked up has only the request's own wait to report
+    elapsed = end - started.get(db_name, request_started)
+    result = {"db": db_name, "elapsed": elapsed}
+    if db_name not in started:
+        result.update(status="timeout", output=f"Error: still queued when the request deadline "
+                                               f"passed after {elapsed:.1f}s")
+    elif db_name in timed_out or future.cancelled() or not future.done():
+        result.update(status="timeout", output=f"Error: timed out after {elapsed:.1f}s")
+    elif future.exception() is not None:
+        result.update(status="error", output=f"Error: {str(future.exception())}")
+    else:
+        result.update(status="ok", **future.result())
+
+    if result["status"] == "ok":
+        print(f"✓ {db_name}: Success ({elapsed:.1f}s, {result['llm_calls']} LLM calls, "
+              f"plan cache {result['plan_cache']})")
+    else:
+        print(f"✗ {db_name}: {result['output']}")
+    return result
+
+def iter_multi_db_query(query: str, relevant_tables: list, max_workers: int = None,
+                        db_timeout: float = None, request_timeout: float = None,
+                        shared_plan: bool = None, mode: str = None, price_store: bool = None):
+    """Yield per-database result dicts as soon as each one finishes or times out.
+
+    Takes the same arguments as ``run_multi_db_query``; results arrive in
+    completion order.
+    """
+    if price_store is None:
+        price_store = should_route(query)
+    if price_store:
+        print(f"Routing price question to {PRICE_STORE_DB}")
+        yield price_store_result(query)
+        return
+
+    max_workers = max_workers or MAX_WORKERS
+    db_timeout = db_timeout if db_timeout is not None else DB_TIMEOUT_S
+    request_timeout = request_timeout if request_timeout is not None else REQUEST_TIMEOUT_S
+    shared_plan = shared_plan if shared_plan is not None else SHARED_PLAN
+    mode = mode or EXECUTION_MODE
+
+    db_tables = group_tables_by_db(relevant_tables)
+    fingerprints = schema_fingerprints(relevant_tables)
+    if not db_tables:
+        return
+
+    print(f"Querying {len(db_tables)} databases with {len(relevant_tables)} relevant tables ({mode})")
+
+    request_started = time.monotonic()
+    request_deadline = request_started + request_timeout
+    started, finished = {}, {}
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(db_tables)))
+
+    def submit(*args):
+        # Each task runs in a copy of the caller's context so its spans join the question's trace
+        return executor.submit(contextvars.copy_context().run, _timed, *args)
+
+    futures = {}
+    if shared_plan:
+        union, groups = shared_plan_groups(db_tables)
+        for group_fingerprint, members in groups:
+            leader = members[0]
+            futures[leader] = submit(
+                leader, started, finished,
+                _answer_db, leader, union, group_fingerprint, query, mode, False
+            )
+            for db_name in members[1:]:
+                futures[db_name] = submit(
+                    db_name, started, finished,
+                    _answer_with_shared_plan, db_name, leader, futures[leader],
+                    db_tables[db_name], fingerprints[db_name], query, mode
+                )
+            print(f"Shared plan: {leader} generates SQL for {', '.join(members[1:])}")
+    for db_name, table_names in db_tables.items():
+        if db_name not in futures:
+            futures[db_name] = submit(
+                db_name, started, finished,
+                _answer_db, db_name, table_names, fingerprints[db_name], query, mode
+            )
+    # Report in relevance order regardless of submission order
+    futures = {db_name: futures[db_name] for db_name in db_tables}
+
+    pending = set(futures.values())
+    timed_out = set()
+    try:
+        while pending:
+            now = time.monotonic()
+            if now >= request_deadline:
+                break
+            # Wake up at the earliest per-DB or request deadline
+            expiries = [request_deadline] + [
+                started[db_name] + db_timeout
+                for db_name, future in futures.items()
+                if future in pending and db_name in started
+            ]
+            done, pending = wait(pending, timeout=max(0, min(expiries) - now), return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for db_name, future in futures.items():
+                if future in pending and db_name in started and now - started[db_name] >= db_timeout:
+                    pending.discard(future)
+                    timed_out.add(db_name)
+                    yield _build_result(db_name, future, timed_out, started, finished, request_started)
+                elif future in done:
+                    yield _build_result(db_name, future, timed_out, started, finished, request_started)
+
+        # Whatever is left missed the request deadline
+        for db_name, future in futures.items():
+            if future in pending:
+                timed_out.add(db_name)
+                yield _build_result(db_name, future, timed_out, started, finished, request_started)
+    finally:
+        # Don't block on agents that missed their deadline; drop queued ones
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def run_multi_db_query(query: str, relevant_tables: list, max_workers: int = None,
+                       db_timeout: float = None, request_timeout: float = None,
+                       shared_plan: bool = None, mode: str = None, price_store: bool = None):
+    """Execute query across relevant databases concurrently.
+
+    Returns one result dict per database, in the order the databases first
+    appear in ``relevant_tables``, with ``status`` set to ``"ok"``,
+    ``"error"`` or ``"timeout"``. A database that misses its own timeout or
+    the overall request deadline is reported as timed out while the others
+    still return their results.
+
+    With ``shared_plan``, databases whose relevant tables have identical
+    schemas get one agent run on the first of them; its SQL is then executed
+    on the others, which fall back to their own agent only if it fails.
+
+    ``mode`` picks how SQL is generated on a plan-cache miss: ``"agent"``
+    runs the LangChain SQL agent, ``"single_shot"`` asks for the SQL in one
+    prompt. Each result reports ``llm_calls`` and ``elapsed``.
+
+    Price-comparison questions are answered from the unified price store
+    (see price_store.py) while it is fresh, as a single ``price_store``
+    result; ``price_store`` forces (True) or disables (False) that route.
+    """
+    results = {
+        result["db"]: result
+        for result in iter_multi_db_query(query, relevant_tables, max_workers, db_timeout,
+                                          request_timeout, shared_plan, mode, price_store)
+    }
+    if PRICE_STORE_DB in results:
+        return [results[PRICE_STORE_DB]]
+    # Stable relevance order, whichever database finished first
+    return [results[db_name] for db_name in group_tables_by_db(relevant_tables)]
 
 # if __name__ == "__main__":
 #     query = "what is the price of the product with id 1"
@@ -0,0 +1,264 @@
+# ===================== name_index.py =====================
+
+import os
+import re
+import sys
+import json
+import time
+import threading
+from collections import Counter
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+NAME_INDEX_PATH = os.getenv(
+    "NAME_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "name_index.json")
+)
+# Share of a question term's trigrams that must appear in a name for it to match
+NAME_MATCH_THRESHOLD = float(os.getenv("NAME_MATCH_THRESHOLD", "0.6"))
+# Minimum trigram Jaccard similarity between a term and a whole name
+NAME_MATCH_MIN_SIMILARITY = float(os.getenv("NAME_MATCH_MIN_SIMILARITY", "0.3"))
+# Matches scoring below this fraction of the best match of their kind are dropped
+NAME_MATCH_RELATIVE = float(os.getenv("NAME_MATCH_RELATIVE", "0.8"))
+NAME_MATCH_LIMIT = int(os.getenv("NAME_MATCH_LIMIT", "5"))
+# Incremental refreshes only see inserted and deleted ids; a full reload this often picks up renames
+NAME_INDEX_FULL_REFRESH_S = float(os.getenv("NAME_INDEX_FULL_REFRESH_S", "3600"))
+
+# Name columns resolved to ids, as (kind, table)
+NAME_SOURCES = [("product", "product"), ("brand", "brand"), ("category", "category")]
+
+STOPWORDS = {
+    "the", "and", "for", "with", "from", "what", "which", "where", "when", "who", "how", "many", "much",
+    "are", "is", "was", "were", "all", "any", "per", "price", "prices", "cheapest", "cheap", "cost",
+    "available", "availability", "stock", "compare", "across", "platforms", "platform", "show", "list",
+    "find", "get", "top", "best", "most", "least", "lowest", "highest", "products", "product", "brand",
+    "brands", "category", "categories", "items", "item", "have", "has", "there", "their", "this", "that",
+    "discount", "discounts", "offer", "offers", "buy", "sell", "sold", "number", "count", "average",
+}
+
+
+def trigrams(text: str) -> set:
+    """Padded character trigrams of each word, so word starts and ends carry weight"""
+    grams = set()
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def question_terms(question: str) -> list:
+    """Candidate entity mentions: content words and adjacent pairs of them"""
+    words = [w for w in re.findall(r"[a-z0-9]+", question.lower()) if len(w) >= 3 and w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class NameIndex:
+    """Trigram inverted index over product, brand and category names of every platform.
+
+    Entries are ``(platform, kind, id, name)``. A name matches a question
+    term when it contains most of the term's trigrams, so "onions" matches
+    "Red Onion"; matches are ranked by trigram Jaccard similarity, so the
+    name closest to the whole term ("red onions") comes first.
+
+    ``generation`` goes up whenever a refresh changes the entries; cached
+    plans that filter on resolved ids are keyed on it.
+    """
+
+    def __init__(self, path: str = NAME_INDEX_PATH):
+        self.path = path
+        self.mtime = None
+        self.entries = []
+        self.watermarks = {}
+        self.generation = 0
+        self.full_refreshed_at = 0.0
+        self._postings = {}
+        self._sizes = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = NAME_INDEX_PATH):
+        index = cls(path)
+        if os.path.exists(path):
+            index.mtime = os.path.getmtime(path)
+            with open(path) as f:
+                data = json.load(f)
+            index.watermarks = data["watermarks"]
+            index.generation = data.get("generation", 0)
+            index.full_refreshed_at = data.get("full_refreshed_at", 0.0)
+            index._set_entries([tuple(entry) for entry in data["entries"]])
+        return index
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"watermarks": self.watermarks, "generation": self.generation,
+                       "full_refreshed_at": self.full_refreshed_at, "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+    def _set_entries(self, entries: list):
+        postings = {}
+        sizes = []
+        for i, (_, _, _, name) in enumerate(entries):
+            grams = trigrams(name)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        with self._lock:
+            self.entries = entries
+            self._postings = postings
+            self._sizes = sizes
+
+    def refresh(self, db_configs: dict, full: bool = False) -> int:
+        """Add names inserted since the last refresh; rebuild a table whose rows were deleted.
+
+        Renamed rows keep their id, so only a full reload notices them; one
+        runs whenever NAME_INDEX_FULL_REFRESH_S has passed since the last.
+        Returns the number of names read from the databases.
+        """
+        if time.time() - self.full_refreshed_at >= NAME_INDEX_FULL_REFRESH_S:
+            full = True
+        kept = {}
+        for entry in self.entries:
+            kept.setdefault((entry[0], entry[1]), []).append(entry)
+        loaded = 0
+        for platform, url in db_configs.items():
+            engine = create_engine(url)
+            try:
+                with engine.connect() as conn:
+                    for kind, table in NAME_SOURCES:
+                        max_id, count = conn.execute(text(f"SELECT MAX(id), COUNT(*) FROM {table}")).one()
+                        seen_max, seen_count = self.watermarks.get(platform, {}).get(kind, (0, 0))
+                        rows_added = conn.execute(
+                            text(f"SELECT COUNT(*) FROM {table} WHERE id > :id"), {"id": seen_max}
+                        ).scalar()
+                        if full or seen_count + rows_added != count:
+                            # Rows were deleted (or this is the first build): reload the table
+                            seen_max = 0
+                            kept[(platform, kind)] = []
+                        rows = conn.execute(
+                            text(f"SELECT id, name FROM {table} WHERE id > :id AND name IS NOT NULL ORDER BY id"),
+                            {"id": seen_max}
+                        ).fetchall()
+                        kept.setdefault((platform, kind), []).extend(
+                            (platform, kind, row_id, name) for row_id, name in rows
+                        )
+                        loaded += len(rows)
+                        self.watermarks.setdefault(platform, {})[kind] = (max_id or 0, count)
+            finally:
+                engine.dispose()
+        if full:
+            self.full_refreshed_at = time.time()
+        entries = [entry for entries in kept.values() for entry in entries]
+        if entries != self.entries:
+            self.generation += 1
+        self._set_entries(entries)
+        return loaded
+
+    def search(self, term: str, threshold: float = NAME_MATCH_THRESHOLD) -> list:
+        """Entries containing ``term`` as ``(similarity, entry)``, most similar first"""
+        grams = trigrams(term)
+        if not grams:
+            return []
+        with self._lock:
+            counts = Counter(i for gram in grams for i in self._postings.get(gram, ()))
+            entries, sizes = self.entries, self._sizes
+        matches = [
+            (hits / (len(grams) + sizes[i] - hits), entries[i])
+            for i, hits in counts.items() if hits / len(grams) >= threshold
+        ]
+        return sorted(matches, key=lambda match: (-match[0], len(match[1][3])))
+
+    def resolve(self, question: str, platforms=None, limit: int = NAME_MATCH_LIMIT) -> dict:
+        """Names mentioned in ``question``, as {platform: {kind: [(id, name), ...]}}"""
+        best = {}
+        for term in question_terms(question):
+            for score, (platform, kind, row_id, name) in self.search(term):
+                if score < NAME_MATCH_MIN_SIMILARITY:
+                    break
+                if platforms is not None and platform not in platforms:
+                    continue
+                key = (platform, kind, row_id)
+                if score > best.get(key, (0, None))[0]:
+                    best[key] = (score, name)
+        resolved, top = {}, {}
+        for (platform, kind, row_id), (score, name) in sorted(best.items(),
+                                                               key=lambda item: (-item[1][0], len(item[1][1]))):
+            top.setdefault((platform, kind), score)
+            matches = resolved.setdefault(platform, {}).setdefault(kind, [])
+            if len(matches) < limit and score >= NAME_MATCH_RELATIVE * top[(platform, kind)]:
+                matches.append((row_id, name))
+        return resolved
+
+    def __len__(self):
+        return len(self.entries)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_name_index() -> NameIndex:
+    """The saved index, reloaded whenever the refresh job rewrites the file"""
+    global _index
+    mtime = os.path.getmtime(NAME_INDEX_PATH) if os.path.exists(NAME_INDEX_PATH) else None
+    with _index_lock:
+        if _index is None or _index.mtime != mtime:
+            _index = NameIndex.load()
+        return _index
+
+
+def _literal(name: str) -> str:
+    """A name as a SQL string literal, so quotes inside it cannot end the hint's string early"""
+    return "'" + name.replace("'", "''") + "'"
+
+
+def format_entity_hints(resolved: dict, table_names) -> str:
+    """Prompt text listing resolved ids for one platform, for the kinds whose tables are in use"""
+    lines = [
+        f"- {kind}: " + ", ".join(f"{_literal(name)} ({kind}.id = {row_id})" for row_id, name in matches)
+        for kind, matches in resolved.items()
+        if kind in table_names
+    ]
+    if not lines:
+        return ""
+    return ("Names in this database that the question may refer to; when one is meant, "
+            "filter on its id instead of pattern-matching names:\n" + "\n".join(lines))
+
+
+def format_store_hints(resolved: dict) -> str:
+    """Prompt text for the unified price store, where products are keyed by (platform, product_id)"""
+    lines = []
+    for platform, kinds in resolved.items():
+        for row_id, name in kinds.get("product", []):
+            lines.append(f"- {_literal(name)}: platform = {_literal(platform)} AND product_id = {row_id}")
+        for kind in ("brand", "category"):
+            for _, name in kinds.get(kind, []):
+                lines.append(f"- {kind} = {_literal(name)} on {platform}")
+    if not lines:
+        return ""
+    return ("Names in the store that the question may refer to; when one is meant, "
+            "filter on its keys instead of pattern-matching names:\n" + "\n".join(lines))
+
+
+if __name__ == "__main__":
+    db_configs = {
+        "blinkit_db": os.getenv("blinkit_db_url"),
+        "zepto_db": os.getenv("zepto_db_url"),
+        "instamart_db": os.getenv("instamart_db_url"),
+        "bigbasket_db": os.getenv("bigbasket_db_url")
+    }
+    # --watch N refreshes every N seconds
+    interval = float(sys.argv[sys.argv.index("--watch") + 1]) if "--watch" in sys.argv else None
+    index = NameIndex.load()
+    full = "--full" in sys.argv
+    while True:
+        start = time.perf_counter()
+        loaded = index.refresh(db_configs, full=full)
+        index.save()
+        print(f"✅ Name index: {loaded} names loaded, {len(index)} indexed, "
+              f"in {time.perf_counter() - start:.2f}s")
+        if not interval:
+            break
+        full = False
+        time.sleep(interval)
@@ -1,56 +1,98 @@
 # ===================== pinecone_embedder.py =====================
 
 import os
-from sqlalchemy import create_engine, inspect
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from pinecone import Pinecone, ServerlessSpec
 from dotenv import load_dotenv
+from embedding_cache import CachedEmbeddings
+from schema_extractor import extract_table_specs, table_fingerprint
+from table_retrieval import save_schema_catalog
+from vector_store import TABLE_STORE_BACKEND, get_table_store
 
 load_dotenv()
 os.environ["GOOGLE_API_KEY"] = os.getenv("GEMINI_API_KEY")
 
 # Initialize
-embedder = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-index_name = 'multi-db-index'
-
-# Create index if needed
-if index_name not in [idx.name for idx in pc.list_indexes()]:
-    pc.create_index(
-        name=index_name,
-        dimension=768,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region="us-east-1")
-    )
-    print(f"✅ Created index: {index_name}")
+EMBEDDING_MODEL = "models/embedding-001"
+embedder = CachedEmbeddings(GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_MODEL)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "100"))
+
+# Pinecone index is created on first run; the local store needs no setup
+if TABLE_STORE_BACKEND == "pinecone":
+    table_store = get_table_store(create_if_missing=True)
 else:
-    print(f"✅ Index {index_name} exists")
-
-index = pc.Index(index_name)
-
-def extract_and_embed_schemas(db_configs: dict):
-    """Extract schemas from databases and embed them"""
-    for db_name, db_url in db_configs.items():
-        print(f"Processing {db_name}...")
-        
-        # Extract schema
-        engine = create_engine(db_url)
-        inspector = inspect(engine)
-        
-        # Embed and store each table
-        for table_name in inspector.get_table_names():
-            columns = inspector.get_columns(table_name)
-            col_defs = [f"{col['name']} {col['type']}" for col in columns]
-            schema_text = f"Table: {table_name}\nColumns: {', '.join(col_defs)}"
-            
-            embedding = embedder.embed_query(schema_text)
-            index.upsert([(
-                f"{db_name}:{table_name}", 
-                embedding, 
-                {"db": db_name, "table": table_name}
-            )])
-        
-        print(f"✅ Embedded {len(inspector.get_table_names())} tables from {db_name}")
+    table_store = get_table_store()
+
+def _extract_tables(db_name: str, db_url: str) -> tuple:
+    """Read table schemas from one database as (db, table, schema_text, fingerprint) records, plus the specs"""
+    engine = create_engine(db_url)
+    records = []
+    specs = extract_table_specs(engine)
+    for table_name, spec in specs.items():
+        col_defs = [f"{name} {col_type}" for name, col_type in spec["columns"]]
+        schema_text = f"Table: {table_name}\nColumns: {', '.join(col_defs)}"
+        records.append((db_name, table_name, schema_text, table_fingerprint(spec)))
+    engine.dispose()
+    return records, specs
+
+def _batches(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def extract_and_embed_schemas(db_configs: dict, embed_batch_size: int = EMBED_BATCH_SIZE,
+                              upsert_batch_size: int = UPSERT_BATCH_SIZE, full: bool = False):
+    """Extract schemas from databases and embed the tables that changed.
+
+    Each vector's metadata carries the table's schema fingerprint; only
+    tables whose fingerprint is new or different are re-embedded, and
+    vectors for tables dropped from a processed database are deleted.
+    ``full=True`` re-embeds everything. The schema catalog used for hybrid
+    retrieval is rewritten for every processed database.
+    """
+    start = time.perf_counter()
+
+    # Extract all databases in parallel
+    with ThreadPoolExecutor(max_workers=max(1, len(db_configs))) as pool:
+        extracted = list(pool.map(lambda item: _extract_tables(*item), db_configs.items()))
+    records = [record for db_records, _ in extracted for record in db_records]
+    save_schema_catalog({db_name: specs for db_name, (_, specs) in zip(db_configs, extracted)})
+
+    existing = table_store.get_all_metadata()
+    current_ids = {f"{db_name}:{table_name}" for db_name, table_name, _, _ in records}
+    changed = [
+        record for record in records
+        if full or existing.get(f"{record[0]}:{record[1]}", {}).get("fingerprint") != record[3]
+    ]
+    dropped = [
+        vec_id for vec_id, meta in existing.items()
+        if meta.get("db") in db_configs and vec_id not in current_ids
+    ]
+    for db_name, (db_records, _) in zip(db_configs, extracted):
+        db_changed = sum(1 for record in changed if record[0] == db_name)
+        print(f"{db_name}: {len(db_records)} tables, {db_changed} new or changed")
+
+    # One embedding call per batch of schema texts
+    embeddings = []
+    for batch in _batches(changed, embed_batch_size):
+        embeddings.extend(embedder.embed_documents([schema_text for _, _, schema_text, _ in batch]))
+
+    vectors = [
+        (f"{db_name}:{table_name}", embedding,
+         {"db": db_name, "table": table_name, "fingerprint": fingerprint})
+        for (db_name, table_name, _, fingerprint), embedding in zip(changed, embeddings)
+    ]
+    for chunk in _batches(vectors, upsert_batch_size):
+        table_store.upsert(chunk)
+    table_store.delete(dropped)
+
+    elapsed = time.perf_counter() - start
+    rate = len(changed) / elapsed if elapsed else 0.0
+    print(f"✅ Embedded {len(changed)} of {len(records)} tables, removed {len(dropped)}, "
+          f"in {elapsed:.2f}s ({rate:.1f} tables/sec)")
 
 if __name__ == "__main__":
     db_configs = {
@@ -60,4 +102,4 @@ if __name__ == "__main__":
         "bigbasket_db": os.getenv("bigbasket_db_url")
     }
     
-    extract_and_embed_schemas(db_configs)
\ No newline at end of file
+    extract_and_embed_schemas(db_configs, full="--full" in sys.argv)
\ No newline at end of file
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from embedding_cache import normalize_text
+
+PLAN_CACHE_TTL_S = float(os.getenv("PLAN_CACHE_TTL_S", "3600"))
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "1024"))
+
+
+class PlanCache:
+    """Remembers the final SQL an agent ran for (db, table set, question).
+
+    Each entry records the schema fingerprint of its tables; a lookup with a
+    different fingerprint, or after the TTL, drops the entry.
+    """
+
+    def __init__(self, ttl: float = PLAN_CACHE_TTL_S, max_entries: int = PLAN_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(db_name: str, table_names, question: str) -> tuple:
+        return (db_name, tuple(sorted(table_names)), normalize_text(question))
+
+    def get(self, key: tuple, fingerprint: str = None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                sql, entry_fingerprint, expires_at = entry
+                if entry_fingerprint == fingerprint and time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return sql
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, sql: str, fingerprint: str = None):
+        with self._lock:
+            self._entries[key] = (sql, fingerprint, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, db_name: str = None, key: tuple = None):
+        """Drop one entry, every entry for a database, or everything"""
+        with self._lock:
+            if key is not None:
+                self._entries.pop(key, None)
+            elif db_name is not None:
+                for k in [k for k in self._entries if k[0] == db_name]:
+                    del self._entries[k]
+            else:
+                self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
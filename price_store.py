@@ -0,0 +1,278 @@
+# ===================== price_store.py =====================
+
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from sqlalchemy import (
+    Column, Float, Index, Integer, MetaData, String, Table, bindparam, create_engine, delete, func,
+    insert, select, text
+)
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PRICE_STORE_DB = "price_store"
+PRICE_STORE_URL = os.getenv(
+    "PRICE_STORE_URL",
+    "sqlite:///" + os.path.join(os.path.dirname(os.path.abspath(__file__)), "price_store.sqlite3")
+)
+# Questions are only routed to the store while its last sync is this recent
+PRICE_STORE_MAX_AGE_S = float(os.getenv("PRICE_STORE_MAX_AGE_S", "900"))
+PRICE_STORE_ROUTING = os.getenv("PRICE_STORE_ROUTING", "1") == "1"
+SYNC_CHUNK = int(os.getenv("PRICE_STORE_SYNC_CHUNK", "5000"))
+
+# Price-comparison questions that the store can answer on its own
+PRICE_QUESTION = re.compile(
+    r"\b(cheap\w*|pric\w*|cost\w*|expensive|discount\w*|offers?|deals?|stock|available|availability|compar\w*)\b",
+    re.IGNORECASE
+)
+# ... unless they also need tables the store does not have
+NOT_PRICE_QUESTION = re.compile(
+    r"\b(orders?|ordered|deliver\w*|users?|customers?|sales?|sold|revenue|warehouses?|cit(y|ies)|slots?)\b",
+    re.IGNORECASE
+)
+
+metadata = MetaData()
+platform_price = Table(
+    "platform_price", metadata,
+    Column("platform", String(50), primary_key=True),
+    Column("product_id", Integer, primary_key=True),
+    Column("product_name", String(255)),
+    Column("brand", String(100)),
+    Column("category", String(100)),
+    Column("unit", String(50)),
+    Column("price", Float),
+    Column("price_effective_from", String(32)),
+    Column("discount_percent", Float),
+    Column("discount_start", String(32)),
+    Column("discount_end", String(32)),
+    Column("final_price", Float),
+    Column("quantity", Integer),
+    Column("in_stock", Integer),
+    Column("inventory_updated_at", String(32)),
+    Column("synced_at", String(32)),
+    Index("platform_price_product_name", "product_name"),
+    Index("platform_price_final_price", "final_price"),
+    Index("platform_price_category", "category"),
+)
+# Per-platform watermarks for incremental refresh
+price_store_sync = Table(
+    "price_store_sync", metadata,
+    Column("platform", String(50), primary_key=True),
+    Column("price_id", Integer),
+    Column("discount_id", Integer),
+    Column("inventory_id", Integer),
+    Column("product_id", Integer),
+    Column("inventory_updated_at", String(32)),
+    Column("as_of", String(32)),
+    Column("synced_at", Float),
+)
+
+# One row per product: latest effective price, best active discount, latest stock
+SOURCE_SQL = """
+WITH latest_price AS (
+    SELECT product_id, price, effective_from,
+           ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY effective_from DESC, id DESC) AS rn
+    FROM price WHERE {filter} AND effective_from <= :now
+), active_discount AS (
+    SELECT product_id, discount_percent, start_date, end_date,
+           ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY discount_percent DESC, id DESC) AS rn
+    FROM discount WHERE {filter} AND start_date <= :today AND end_date >= :today
+), stock AS (
+    SELECT product_id, quantity, updated_at,
+           ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY updated_at DESC, id DESC) AS rn
+    FROM inventory WHERE {filter}
+)
+SELECT p.id, p.name, b.name, c.name, u.name,
+       lp.price, lp.effective_from, ad.discount_percent, ad.start_date, ad.end_date,
+       s.quantity, s.updated_at
+FROM product p
+LEFT JOIN brand b ON b.id = p.brand_id
+LEFT JOIN category c ON c.id = p.category_id
+LEFT JOIN unit u ON u.id = p.unit_id
+LEFT JOIN latest_price lp ON lp.product_id = p.id AND lp.rn = 1
+LEFT JOIN active_discount ad ON ad.product_id = p.id AND ad.rn = 1
+LEFT JOIN stock s ON s.product_id = p.id AND s.rn = 1
+WHERE {product_filter}
+"""
+
+# Products whose store row may have changed since the last sync
+CHANGED_SQL = """
+SELECT product_id FROM price
+WHERE id > :price_id OR (effective_from > :last_now AND effective_from <= :now)
+UNION SELECT product_id FROM discount
+WHERE id > :discount_id OR (start_date > :last_today AND start_date <= :today)
+   OR (end_date >= :last_today AND end_date < :today)
+UNION SELECT product_id FROM inventory WHERE id > :inventory_id OR updated_at > :inventory_updated_at
+UNION SELECT id FROM product WHERE id > :product_id
+"""
+
+WATERMARK_SQL = """
+SELECT (SELECT MAX(id) FROM price), (SELECT MAX(id) FROM discount), (SELECT MAX(id) FROM inventory),
+       (SELECT MAX(id) FROM product), (SELECT MAX(updated_at) FROM inventory)
+"""
+
+_store_engine = None
+
+
+def get_store_engine():
+    global _store_engine
+    if _store_engine is None:
+        _store_engine = create_engine(PRICE_STORE_URL, pool_pre_ping=True)
+        metadata.create_all(_store_engine)
+    return _store_engine
+
+
+def _stamp(value) -> str:
+    """Timestamps as 'YYYY-MM-DD HH:MM:SS' strings, the same on Postgres and SQLite sources"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value).replace("T", " ")
+
+
+def _store_rows(platform: str, rows, synced_at: str) -> list:
+    records = []
+    for (product_id, name, brand, category, unit, price, effective_from,
+         discount, discount_start, discount_end, quantity, inventory_updated_at) in rows:
+        price = float(price) if price is not None else None
+        discount = float(discount) if discount is not None else None
+        records.append({
+            "platform": platform,
+            "product_id": product_id,
+            "product_name": name,
+            "brand": brand,
+            "category": category,
+            "unit": unit,
+            "price": price,
+            "price_effective_from": _stamp(effective_from),
+            "discount_percent": discount,
+            "discount_start": _stamp(discount_start),
+            "discount_end": _stamp(discount_end),
+            "final_price": round(price * (1 - (discount or 0) / 100), 2) if price is not None else None,
+            "quantity": quantity,
+            "in_stock": int(bool(quantity)),
+            "inventory_updated_at": _stamp(inventory_updated_at),
+            "synced_at": synced_at,
+        })
+    return records
+
+
+def _replace_products(conn, platform: str, product_ids: list, records: list):
+    conn.execute(delete(platform_price).where(
+        platform_price.c.platform == platform, platform_price.c.product_id.in_(product_ids)
+    ))
+    if records:
+        conn.execute(insert(platform_price), records)
+
+
+def sync_platform(platform: str, source, full: bool = False) -> int:
+    """Refresh one platform's rows in the store; returns the number of products rewritten.
+
+    The rewrite and the new watermarks commit in one store transaction, so
+    questions routed to the store never see a platform half synced.
+    """
+    store = get_store_engine()
+    now = datetime.now()
+    params = {"now": _stamp(now), "today": now.date().isoformat()}
+    synced_at = params["now"]
+
+    with store.connect() as conn:
+        state = conn.execute(
+            select(price_store_sync).where(price_store_sync.c.platform == platform)
+        ).mappings().first()
+    full = full or state is None
+
+    with source.connect() as conn, store.begin() as store_conn:
+        watermarks = conn.execute(text(WATERMARK_SQL)).one()
+        if full:
+            product_ids = [row[0] for row in conn.execute(text("SELECT id FROM product ORDER BY id"))]
+            store_conn.execute(delete(platform_price).where(platform_price.c.platform == platform))
+        else:
+            product_ids = sorted({row[0] for row in conn.execute(text(CHANGED_SQL), {
+                **params,
+                "price_id": state["price_id"] or 0,
+                "discount_id": state["discount_id"] or 0,
+                "inventory_id": state["inventory_id"] or 0,
+                "product_id": state["product_id"] or 0,
+                "inventory_updated_at": state["inventory_updated_at"] or "1970-01-01 00:00:00",
+                "last_now": state["as_of"],
+                "last_today": state["as_of"][:10],
+            }) if row[0] is not None})
+
+        query = text(SOURCE_SQL.format(filter="product_id IN :ids", product_filter="p.id IN :ids")).bindparams(
+            bindparam("ids", expanding=True)
+        )
+        for i in range(0, len(product_ids), SYNC_CHUNK):
+            chunk = product_ids[i:i + SYNC_CHUNK]
+            rows = conn.execute(query, {**params, "ids": chunk}).fetchall()
+            _replace_products(store_conn, platform, chunk, _store_rows(platform, rows, synced_at))
+
+        price_id, discount_id, inventory_id, product_id, inventory_updated_at = watermarks
+        store_conn.execute(delete(price_store_sync).where(price_store_sync.c.platform == platform))
+        store_conn.execute(insert(price_store_sync), {
+            "platform": platform,
+            "price_id": price_id,
+            "discount_id": discount_id,
+            "inventory_id": inventory_id,
+            "product_id": product_id,
+            "inventory_updated_at": _stamp(inventory_updated_at),
+            "as_of": params["now"],
+            "synced_at": time.time(),
+        })
+    return len(product_ids)
+
+
+def sync_price_store(db_configs: dict, full: bool = False):
+    """Incrementally refresh the store from every platform database"""
+    start = time.perf_counter()
+    total = 0
+    for platform, url in db_configs.items():
+        source = create_engine(url)
+        try:
+            changed = sync_platform(platform, source, full=full)
+        finally:
+            source.dispose()
+        total += changed
+        print(f"{platform}: {changed} products synced")
+    print(f"✅ Price store synced {total} products in {time.perf_counter() - start:.2f}s")
+
+
+def store_is_fresh(max_age: float = PRICE_STORE_MAX_AGE_S) -> bool:
+    """True when every synced platform was refreshed within ``max_age`` seconds"""
+    with get_store_engine().connect() as conn:
+        oldest = conn.execute(select(func.min(price_store_sync.c.synced_at))).scalar()
+    return oldest is not None and time.time() - oldest <= max_age
+
+
+def is_price_question(query: str) -> bool:
+    return bool(PRICE_QUESTION.search(query)) and not NOT_PRICE_QUESTION.search(query)
+
+
+def should_route(query: str) -> bool:
+    """Whether to answer ``query`` from the store instead of the per-platform agents"""
+    if not PRICE_STORE_ROUTING or not is_price_question(query):
+        return False
+    try:
+        return store_is_fresh()
+    except Exception as e:
+        print(f"Price store unavailable: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    db_configs = {
+        "blinkit_db": os.getenv("blinkit_db_url"),
+        "zepto_db": os.getenv("zepto_db_url"),
+        "instamart_db": os.getenv("instamart_db_url"),
+        "bigbasket_db": os.getenv("bigbasket_db_url")
+    }
+    # --watch N re-syncs every N seconds
+    interval = float(sys.argv[sys.argv.index("--watch") + 1]) if "--watch" in sys.argv else None
+    sync_price_store(db_configs, full="--full" in sys.argv)
+    while interval:
+        time.sleep(interval)
+        sync_price_store(db_configs)
@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import threading
+from collections import Counter
+from collections.abc import MutableMapping
+from tracing import metrics, record_span
+
+# Where per-(db, table set) agent usage is kept, so warm-up can pre-build the common agents
+TABLE_SET_USAGE_PATH = os.getenv(
+    "TABLE_SET_USAGE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "table_set_usage.json")
+)
+TABLE_SET_USAGE_FLUSH_S = float(os.getenv("TABLE_SET_USAGE_FLUSH_S", "30"))
+
+_MISSING = object()
+
+
+class ResourceRegistry:
+    """Process-wide resources built on first use.
+
+    Factories are registered by name at import time and run once, under a
+    per-name lock, the first time ``get`` asks for them; every thread and
+    Streamlit session then shares the same instance. ``set`` replaces a
+    resource (tests, benchmarks).
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._values = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory):
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str):
+        value = self._values.get(name, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._locks[name]:
+            value = self._values.get(name, _MISSING)
+            if value is _MISSING:
+                wall_start, started = time.time(), time.perf_counter()
+                value = self._factories[name]()
+                elapsed = time.perf_counter() - started
+                metrics.observe("sql_agents_resource_init_seconds", elapsed, resource=name)
+                record_span("resource_init", wall_start, elapsed, resource=name)
+                print(f"Initialized {name} in {elapsed:.2f}s")
+                self._values[name] = value
+            return value
+
+    def set(self, name: str, value):
+        with self._lock:
+            self._locks.setdefault(name, threading.Lock())
+        self._values[name] = value
+
+    def reset(self, name: str = None):
+        """Forget one built resource, or all of them; the next ``get`` rebuilds it"""
+        with self._lock:
+            for key in [name] if name is not None else list(self._values):
+                self._values.pop(key, None)
+
+    def built(self) -> list:
+        return list(self._values)
+
+
+registry = ResourceRegistry()
+
+
+class LazyEngines(MutableMapping):
+    """Mapping of database name to engine, creating each one on first access as ``factory(db_name, url)``"""
+
+    def __init__(self, urls: dict, factory):
+        self.urls = dict(urls)
+        self._factory = factory
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, db_name: str):
+        engine = self._engines.get(db_name)
+        if engine is None:
+            if db_name not in self.urls:
+                raise KeyError(db_name)
+            with self._lock:
+                engine = self._engines.get(db_name)
+                if engine is None:
+                    engine = self._engines[db_name] = self._factory(db_name, self.urls[db_name])
+        return engine
+
+    def __setitem__(self, db_name: str, engine):
+        with self._lock:
+            self._engines[db_name] = engine
+            self.urls[db_name] = engine.url.render_as_string(hide_password=False)
+
+    def __delitem__(self, db_name: str):
+        with self._lock:
+            self.urls.pop(db_name)
+            self._engines.pop(db_name, None)
+
+    def __iter__(self):
+        return iter(self.urls)
+
+    def __len__(self):
+        return len(self.urls)
+
+    def created(self) -> dict:
+        """Engines that have been created so far"""
+        return dict(self._engines)
+
+
+class TableSetUsage:
+    """How often each (db, table set) agent was used, persisted across restarts"""
+
+    def __init__(self, path: str = TABLE_SET_USAGE_PATH, flush_interval: float = TABLE_SET_USAGE_FLUSH_S):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.counts = Counter()
+        self._flushed_at = time.monotonic()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.counts.update({
+                        (db_name, tuple(tables)): count for db_name, tables, count in json.load(f)
+                    })
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable table set usage: {e}")
+
+    def record(self, db_name: str, table_names: tuple):
+        with self._lock:
+            self.counts[(db_name, tuple(table_names))] += 1
+            self._dirty = True
+            due = time.monotonic() - self._flushed_at >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                rows = [[db_name, list(tables), count] for (db_name, tables), count in self.counts.items()]
+                self._flushed_at = time.monotonic()
+                self._dirty = False
+            try:
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(rows, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Could not save table set usage: {e}")
+
+    def most_common(self, n: int) -> list:
+        with self._lock:
+            return [key for key, _ in self.counts.most_common(n)]
@@ -0,0 +1,253 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import sqlglot
+from sqlglot import exp
+from sqlalchemy import bindparam, text
+from bounded_sql import execute_bounded, aexecute_bounded
+from sql_generation import SQLGLOT_DIALECTS
+from tracing import metrics
+
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+# How long a table's version token is trusted before it is looked up again. Writes made
+# within this window are served stale; on Postgres add the statistics flush delay (about 1s).
+RESULT_CACHE_VERSION_TTL_S = float(os.getenv("RESULT_CACHE_VERSION_TTL_S", "5"))
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+
+# Columns that move whenever a table's rows change, for databases without
+# Postgres statistics; other tables fall back to their row count
+VERSION_COLUMNS = {"inventory": "updated_at", "price": "effective_from", "platform_price": "synced_at"}
+
+# Functions whose result changes between runs of the same SQL
+VOLATILE_FUNCTIONS = (exp.CurrentTimestamp, exp.CurrentDate, exp.CurrentTime, exp.Rand)
+
+
+def parse_cacheable(sql: str, dialect: str):
+    """Normalized SQL and its base tables, or None if the result must not be cached"""
+    read = SQLGLOT_DIALECTS.get(dialect, dialect)
+    try:
+        statements = [s for s in sqlglot.parse(sql, read=read) if s]
+    except sqlglot.errors.SqlglotError:
+        return None
+    if len(statements) != 1 or not isinstance(statements[0], exp.Query):
+        return None
+    tree = statements[0]
+    if any(tree.find_all(*VOLATILE_FUNCTIONS)):
+        return None
+    ctes = {cte.alias_or_name for cte in tree.find_all(exp.CTE)}
+    tables = sorted({
+        f"{table.db}.{table.name}" if table.db else table.name
+        for table in tree.find_all(exp.Table) if table.db or table.name not in ctes
+    })
+    if not tables:
+        return None
+    return tree.sql(dialect=read), tables
+
+
+# One token per relation: its oid and file node change on DROP/CREATE and TRUNCATE, the
+# write counters and maintenance times on everything else. The counters lag commits by
+# the statistics flush interval. Views and other relations without storage get NULL.
+_PG_VERSION_SQL = (
+    "SELECT CAST(:{param} AS text), CASE WHEN c.relkind IN ('r', 'p', 'm') THEN "
+    "format('%s:%s:%s:%s:%s:%s:%s:%s:%s:%s', c.oid, pg_relation_filenode(c.oid), "
+    "s.n_tup_ins, s.n_tup_upd, s.n_tup_del, s.n_live_tup, "
+    "s.last_vacuum, s.last_autovacuum, s.last_analyze, s.last_autoanalyze) END "
+    "FROM pg_class c LEFT JOIN pg_stat_all_tables s ON s.relid = c.oid "
+    "WHERE c.oid = to_regclass(:{param}_name)"
+)
+
+
+def _quote_table(engine, table: str) -> str:
+    quote = engine.dialect.identifier_preparer.quote
+    return ".".join(quote(part) for part in table.split("."))
+
+
+def _version_sql(engine, tables: list):
+    params = {f"table_{i}": table for i, table in enumerate(tables)}
+    if engine.dialect.name == "postgresql":
+        # to_regclass resolves each name through the search_path, like the query itself
+        selects = [_PG_VERSION_SQL.format(param=param) for param in params]
+        params.update({f"{param}_name": _quote_table(engine, table) for param, table in list(params.items())})
+    else:
+        selects = []
+        for param, table in params.items():
+            column = VERSION_COLUMNS.get(table.split(".")[-1])
+            token = f"COUNT(*) || ':' || COALESCE(MAX({_quote_table(engine, column)}), '')" if column else "COUNT(*)"
+            selects.append(f"SELECT :{param}, {token} FROM {_quote_table(engine, table)}")
+    return text(" UNION ALL ".join(selects)).bindparams(**params)
+
+
+class TableVersions:
+    """Short-lived per-table version tokens, fetched in one query per lookup.
+
+    A token of None marks a relation whose changes cannot be tracked (a
+    Postgres view); results reading it are not cached.
+    """
+
+    def __init__(self, ttl: float = RESULT_CACHE_VERSION_TTL_S):
+        self.ttl = ttl
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, db_name: str, tables: list):
+        now = time.monotonic()
+        with self._lock:
+            tokens = {table: self._tokens.get((db_name, table)) for table in tables}
+        if all(token is not None and now < token[1] for token in tokens.values()):
+            return tuple(tokens[table][0] for table in tables)
+        return None
+
+    def _store(self, db_name: str, tables: list, rows) -> tuple:
+        found = {str(name): None if token is None else str(token) for name, token in rows}
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for table in tables:
+                self._tokens[(db_name, table)] = (found.get(table, ""), expires)
+        return tuple(found.get(table, "") for table in tables)
+
+    def get(self, engine, db_name: str, tables: list) -> tuple:
+        cached = self._fresh(db_name, tables)
+        if cached is not None:
+            return cached
+        with engine.connect() as conn:
+            rows = conn.execute(_version_sql(engine, tables)).fetchall()
+        return self._store(db_name, tables, rows)
+
+    async def aget(self, engine, db_name: str, tables: list) -> tuple:
+        cached = self._fresh(db_name, tables)
+        if cached is not None:
+            return cached
+        async with engine.connect() as conn:
+            rows = (await conn.execute(_version_sql(engine, tables))).fetchall()
+        return self._store(db_name, tables, rows)
+
+    def invalidate(self, db_name: str = None):
+        with self._lock:
+            for key in list(self._tokens):
+                if db_name is None or key[0] == db_name:
+                    del self._tokens[key]
+
+
+class ResultCache:
+    """LRU of bounded query results keyed by (db, normalized SQL, caps).
+
+    Each entry stores the version tokens of the tables it read; a lookup
+    with different tokens drops the entry. Evicts by entry count and by the
+    approximate memory size of the cached rows.
+    """
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_MAX_BYTES,
+                 max_entries: int = RESULT_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, versions: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.inc("sql_agents_result_cache_total", result="hit")
+                return entry[0]
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            metrics.inc("sql_agents_result_cache_total", result="miss")
+            return None
+
+    def put(self, key: tuple, versions: tuple, result: dict):
+        size = len(repr(result["rows"])) + len(repr(key))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (result, versions, size)
+            self.size += size
+            while self._entries and (len(self._entries) > self.max_entries or self.size > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: tuple):
+        self.size -= self._entries.pop(key)[2]
+
+    def invalidate(self, db_name: str = None):
+        """Drop every entry, or those of one database"""
+        with self._lock:
+            for key in list(self._entries):
+                if db_name is None or key[0] == db_name:
+                    self._drop(key)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.size,
+        }
+
+
+result_cache = ResultCache()
+table_versions = TableVersions()
+
+
+def _copy(result: dict) -> dict:
+    # Callers annotate result dicts, so never hand out the cached one itself
+    return {**result, "rows": list(result["rows"]), "cache": "hit"}
+
+
+def cached_execute_bounded(engine, db_name: str, sql: str, dialect: str = None, **caps) -> dict:
+    """execute_bounded served from ``result_cache`` while the tables it reads are unchanged.
+
+    Table versions are rechecked at most every RESULT_CACHE_VERSION_TTL_S,
+    so a write can go unseen for that long.
+    """
+    dialect = dialect or engine.dialect.name
+    parsed = parse_cacheable(sql, dialect) if RESULT_CACHE_ENABLED else None
+    if parsed is None:
+        return execute_bounded(engine, sql, dialect, **caps)
+    normalized, tables = parsed
+    key = (db_name, normalized, tuple(sorted(caps.items())))
+    try:
+        versions = table_versions.get(engine, db_name, tables)
+    except Exception:
+        # Unknown tables and the like: let the query itself report the error
+        return execute_bounded(engine, sql, dialect, **caps)
+    if None in versions:
+        return execute_bounded(engine, sql, dialect, **caps)
+    cached = result_cache.get(key, versions)
+    if cached is not None:
+        return _copy(cached)
+    result = execute_bounded(engine, sql, dialect, **caps)
+    result_cache.put(key, versions, result)
+    return {**result, "cache": "miss"}
+
+
+async def acached_execute_bounded(engine, db_name: str, sql: str, dialect: str = None, **caps) -> dict:
+    """Async variant of cached_execute_bounded for an AsyncEngine"""
+    dialect = dialect or engine.dialect.name
+    parsed = parse_cacheable(sql, dialect) if RESULT_CACHE_ENABLED else None
+    if parsed is None:
+        return await aexecute_bounded(engine, sql, dialect, **caps)
+    normalized, tables = parsed
+    key = (db_name, normalized, tuple(sorted(caps.items())))
+    try:
+        versions = await table_versions.aget(engine, db_name, tables)
+    except Exception:
+        return await aexecute_bounded(engine, sql, dialect, **caps)
+    if None in versions:
+        return await aexecute_bounded(engine, sql, dialect, **caps)
+    cached = result_cache.get(key, versions)
+    if cached is not None:
+        return _copy(cached)
+    result = await aexecute_bounded(engine, sql, dialect, **caps)
+    result_cache.put(key, versions, result)
+    return {**result, "cache": "miss"}
@@ -0,0 +1,146 @@
+import os
+import re
+import contextvars
+from contextlib import contextmanager
+from functools import lru_cache
+from sqlalchemy import inspect, text
+
+# Token budget for the schema text of one prompt; 0 sends the full schema
+SCHEMA_TOKEN_BUDGET = int(os.getenv("SCHEMA_TOKEN_BUDGET", "1500"))
+SCHEMA_TOKEN_MODEL = os.getenv("SCHEMA_TOKEN_MODEL", "gpt-4o-mini")
+SAMPLE_ROWS = 3
+SAMPLE_VALUE_CHARS = 40
+# Columns named in the question score at least this and are never dropped
+KEEP_RELEVANCE = 0.7
+
+# The question being answered, so schema lookups deep inside the agent's
+# tools can rank columns by relevance to it
+current_question = contextvars.ContextVar("current_question", default="")
+
+
+@contextmanager
+def question_context(question: str):
+    token = current_question.set(question)
+    try:
+        yield
+    finally:
+        current_question.reset(token)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    import tiktoken
+    try:
+        try:
+            return tiktoken.encoding_for_model(SCHEMA_TOKEN_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use; estimate when that fails
+        print(f"tiktoken unavailable, estimating tokens as chars / 4: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    return len(encoding.encode(text)) if encoding is not None else len(text) // 4
+
+
+def table_spec(engine, table_name: str) -> dict:
+    """Columns, keys and a few sample rows of one table, for compact rendering"""
+    inspector = inspect(engine)
+    columns = [(col["name"], str(col["type"])) for col in inspector.get_columns(table_name)]
+    pk = set(inspector.get_pk_constraint(table_name).get("constrained_columns") or [])
+    fks = {}
+    for fk in inspector.get_foreign_keys(table_name):
+        for col, ref_col in zip(fk["constrained_columns"], fk["referred_columns"]):
+            fks[col] = f"{fk['referred_table']}({ref_col})"
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT * FROM {quote(table_name)} LIMIT {SAMPLE_ROWS}")).fetchall()
+    return {"name": table_name, "columns": columns, "pk": pk, "fks": fks,
+            "sample_rows": [tuple(row) for row in rows]}
+
+
+def render_table(spec: dict, keep=None, sample_rows: int = SAMPLE_ROWS) -> str:
+    """CREATE TABLE text for the kept columns, with up to ``sample_rows`` shortened sample rows"""
+    keep = keep if keep is not None else {name for name, _ in spec["columns"]}
+    positions = [i for i, (name, _) in enumerate(spec["columns"]) if name in keep]
+    lines = []
+    for i in positions:
+        name, col_type = spec["columns"][i]
+        line = f"\t{name} {col_type}"
+        if name in spec["pk"]:
+            line += " PRIMARY KEY"
+        if name in spec["fks"]:
+            line += f" REFERENCES {spec['fks'][name]}"
+        lines.append(line)
+    omitted = len(spec["columns"]) - len(positions)
+    if omitted:
+        lines.append(f"\t-- {omitted} more columns omitted")
+    rendered = f"CREATE TABLE {spec['name']} (\n" + ",\n".join(lines) + "\n)"
+    if sample_rows and spec["sample_rows"]:
+        header = "\t".join(spec["columns"][i][0] for i in positions)
+        rows = [
+            "\t".join(str(row[i])[:SAMPLE_VALUE_CHARS] for i in positions)
+            for row in spec["sample_rows"][:sample_rows]
+        ]
+        rendered += f"\n\n/*\n{len(rows)} rows from {spec['name']} table:\n{header}\n" + "\n".join(rows) + "\n*/"
+    return rendered
+
+
+def _words(text: str) -> set:
+    # Crude singular form so "prices" matches "price" and "discounts" matches "discount"
+    return {w[:-1] if len(w) > 3 and w.endswith("s") else w for w in re.findall(r"[a-z0-9]+", text.lower())}
+
+
+def column_relevance(table_name: str, column: str, question_words: set) -> float:
+    """How strongly a column name relates to the question's words"""
+    parts = _words(column.replace("_", " "))
+    score = 0.0
+    for part in parts:
+        for word in question_words:
+            if part == word:
+                score = max(score, 1.0)
+            elif len(word) >= 4 and len(part) >= 4 and (part.startswith(word) or word.startswith(part)):
+                score = max(score, 0.7)
+    # Names are what answers are usually reported by
+    if column == "name":
+        score = max(score, 0.5)
+    if table_name in question_words or table_name.rstrip("s") in question_words:
+        score += 0.1
+    return score
+
+
+def compact_schema(specs: list, question: str, budget: int) -> str:
+    """Render table specs within ``budget`` tokens.
+
+    Shortens then drops sample rows, then drops the columns least relevant
+    to the question, one at a time. Primary and foreign key columns are
+    always kept so joins stay possible, and so are columns the question
+    names, even if that leaves the text over budget.
+    """
+    def render(keep, sample_rows):
+        return "\n\n".join(render_table(spec, keep[spec["name"]], sample_rows) for spec in specs)
+
+    keep = {spec["name"]: {name for name, _ in spec["columns"]} for spec in specs}
+    for sample_rows in (1, 0):
+        rendered = render(keep, sample_rows)
+        if count_tokens(rendered) <= budget:
+            return rendered
+
+    question_words = _words(question)
+    droppable = sorted(
+        (column_relevance(spec["name"], name, question_words), spec["name"], name)
+        for spec in specs
+        for name, _ in spec["columns"]
+        if name not in spec["pk"] and name not in spec["fks"]
+    )
+    for relevance, table_name, column in droppable:
+        if relevance >= KEEP_RELEVANCE:
+            break
+        keep[table_name].discard(column)
+        rendered = render(keep, 0)
+        if count_tokens(rendered) <= budget:
+            break
+    return rendered
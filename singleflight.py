@@ -0,0 +1,113 @@
+import os
+import asyncio
+import threading
+import time
+from embedding_cache import normalize_text
+from tracing import metrics, record_span
+
+# Identical questions arriving while one is being answered wait for its
+# result instead of repeating retrieval, the per-DB agents and the analysis
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "1") == "1"
+
+
+def make_key(question: str, *parts) -> tuple:
+    """Coalescing key: the normalized question plus whatever else changes the answer"""
+    return (normalize_text(question),) + parts
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller (the leader) runs ``fn``; callers arriving before it
+    finishes block and receive the same result, or the same exception. The
+    result object is shared, so callers must treat it as read-only. If the
+    leader is interrupted (a BaseException such as a Streamlit rerun), its
+    followers retry and one of them becomes the new leader.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Return ``(result, shared)``; ``shared`` is True for a follower"""
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+            if leader:
+                return self._lead(key, call, fn, *args, **kwargs), False
+
+            metrics.inc("sql_agents_singleflight_total", flight=self.name, role="follower")
+            wall_start, started = time.time(), time.perf_counter()
+            call.done.wait()
+            waited = time.perf_counter() - started
+            metrics.observe("sql_agents_singleflight_wait_seconds", waited, flight=self.name)
+            record_span("coalesced", wall_start, waited, flight=self.name)
+            if call.error is None:
+                return call.result, True
+            if isinstance(call.error, Exception):
+                raise call.error
+
+    def _lead(self, key, call: _Call, fn, *args, **kwargs):
+        metrics.inc("sql_agents_singleflight_total", flight=self.name, role="leader")
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines on one event loop"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Await ``fn(*args, **kwargs)`` once per key; returns ``(result, shared)``"""
+        while True:
+            task = self._calls.get(key)
+            if task is None:
+                metrics.inc("sql_agents_singleflight_total", flight=self.name, role="leader")
+                task = self._calls[key] = asyncio.ensure_future(fn(*args, **kwargs))
+                task.add_done_callback(lambda _, key=key: self._calls.pop(key, None))
+                # A cancelled leader must not cancel the shared task under its followers
+                return await asyncio.shield(task), False
+
+            metrics.inc("sql_agents_singleflight_total", flight=self.name, role="follower")
+            wall_start, started = time.time(), time.perf_counter()
+            try:
+                result = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if task.cancelled():
+                    continue
+                raise
+            finally:
+                waited = time.perf_counter() - started
+                metrics.observe("sql_agents_singleflight_wait_seconds", waited, flight=self.name)
+                record_span("coalesced", wall_start, waited, flight=self.name)
+            return result, True
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,92 @@
+import re
+import sqlglot
+from sqlglot import exp
+
+SQL_PROMPT = """You are a {dialect} expert. Write one SQL query that answers the question using only the tables below.
+Unless the question asks for a specific number of rows, return at most {top_k} rows.
+Return only the SQL query, with no explanation and no markdown.
+
+{table_info}
+
+Question: {question}
+SQL:"""
+
+REPAIR_PROMPT = """{prompt} {sql}
+
+The query above failed with this error:
+{error}
+
+Return only the corrected SQL query, with no explanation and no markdown.
+SQL:"""
+
+# SQLAlchemy dialect names that sqlglot spells differently
+SQLGLOT_DIALECTS = {"postgresql": "postgres"}
+
+# Nodes that write, lock or change state, wherever they appear in a query
+# (a data-modifying CTE parses as a SELECT with a DELETE inside it)
+WRITE_EXPRESSIONS = (
+    exp.Insert, exp.Update, exp.Delete, exp.Merge, exp.Create, exp.Drop, exp.Alter, exp.TruncateTable,
+    exp.Copy, exp.Grant, exp.Set, exp.LoadData, exp.Command, exp.Into, exp.Lock,
+)
+
+
+def build_sql_prompt(dialect: str, table_info: str, question: str, top_k: int = 10) -> str:
+    return SQL_PROMPT.format(dialect=dialect, table_info=table_info, question=question, top_k=top_k)
+
+
+def build_repair_prompt(prompt: str, sql: str, error: Exception) -> str:
+    return REPAIR_PROMPT.format(prompt=prompt, sql=sql, error=str(error)[:1000])
+
+
+def extract_sql(text: str) -> str:
+    """Strip markdown fences and a leading 'SQL:' label from a model reply"""
+    fenced = re.search(r"```(?:sql)?\s*(.*?)```", text, re.DOTALL | re.IGNORECASE)
+    if fenced:
+        text = fenced.group(1)
+    text = re.sub(r"^\s*SQL:\s*", "", text.strip(), flags=re.IGNORECASE)
+    return text.strip().rstrip(";").strip()
+
+
+def validate_sql(sql: str, table_columns: dict, dialect: str = "postgresql"):
+    """Check that SQL is a single read-only query over known tables and columns.
+
+    ``table_columns`` maps each allowed table to its column names. Raises
+    ``ValueError`` (or sqlglot's ``ParseError``) describing the first
+    problem found, suitable for feeding back to the model.
+    """
+    statements = [s for s in sqlglot.parse(sql, read=SQLGLOT_DIALECTS.get(dialect, dialect)) if s]
+    if len(statements) != 1:
+        raise ValueError(f"Expected exactly one SQL statement, got {len(statements)}")
+    tree = statements[0]
+    if not isinstance(tree, exp.Query):
+        raise ValueError("Only SELECT queries are allowed")
+    write = tree.find(*WRITE_EXPRESSIONS)
+    if write is not None:
+        raise ValueError(f"Only read-only queries are allowed; found {write.key.upper()}")
+
+    allowed = {table.lower(): {col.lower() for col in cols} for table, cols in table_columns.items()}
+    derived = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+    derived |= {sub.alias.lower() for sub in tree.find_all(exp.Subquery) if sub.alias}
+
+    tables = {table.name.lower() for table in tree.find_all(exp.Table)} - derived
+    unknown_tables = sorted(tables - set(allowed))
+    if unknown_tables:
+        raise ValueError(f"Unknown tables: {', '.join(unknown_tables)}. Available tables: {', '.join(sorted(allowed))}")
+
+    known_columns = {col for table in tables for col in allowed[table]}
+    aliases = {alias.alias.lower() for alias in tree.find_all(exp.Alias)}
+    table_aliases = {table.alias_or_name.lower(): table.name.lower() for table in tree.find_all(exp.Table)}
+    for column in tree.find_all(exp.Column):
+        # alias.* selects whatever the table has
+        if isinstance(column.this, exp.Star):
+            continue
+        name = column.name.lower()
+        qualifier = column.table.lower()
+        if not name or qualifier in derived:
+            continue
+        if qualifier:
+            table = table_aliases.get(qualifier)
+            if table in allowed and name not in allowed[table]:
+                raise ValueError(f"Unknown column {column.table}.{column.name}; {table} has: {', '.join(sorted(allowed[table]))}")
+        elif name not in known_columns and name not in aliases:
+            raise ValueError(f"Unknown column {column.name}")
@@ -0,0 +1,242 @@
+# ===================== table_retrieval.py =====================
+
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter, deque
+from tracing import span
+
+# Table and column names plus foreign keys of every indexed database, written by pinecone_embedder
+SCHEMA_CATALOG_PATH = os.getenv(
+    "SCHEMA_CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema_catalog.json")
+)
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "1") == "1"
+# Vector candidates fetched per requested table, before fusing with BM25
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "4"))
+# Reciprocal rank fusion: score = weight / (RRF_K + rank), summed over both rankings
+HYBRID_RRF_K = float(os.getenv("HYBRID_RRF_K", "60"))
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Join paths longer than this are not followed; at most JOIN_EXPAND_MAX tables are added per database
+JOIN_MAX_HOPS = int(os.getenv("JOIN_MAX_HOPS", "3"))
+JOIN_EXPAND_MAX = int(os.getenv("JOIN_EXPAND_MAX", "4"))
+
+STOPWORDS = {
+    "the", "and", "for", "with", "from", "what", "which", "where", "when", "who", "how", "many", "much",
+    "are", "is", "was", "were", "all", "any", "per", "in", "on", "of", "to", "by", "at", "my", "me",
+    "a", "an", "or", "than", "that", "this", "there", "have", "has", "do", "does", "did", "show", "list",
+    "id", "ids",
+}
+
+
+def stem(word: str) -> str:
+    """Crude singular prefix, so "cities"/"city" and "delivered"/"delivery" meet"""
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        word = word[:-1]
+    return word[:5]
+
+
+def tokenize(text: str) -> list:
+    """Stemmed words of a question or identifier; underscores split words"""
+    return [stem(w) for w in re.findall(r"[a-z0-9]+", text.lower().replace("_", " ")) if w not in STOPWORDS]
+
+
+def save_schema_catalog(specs: dict, path: str = None):
+    """Store ``{db: extract_table_specs(engine)}``, replacing only the databases given"""
+    path = path or SCHEMA_CATALOG_PATH
+    tables = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            tables = {key: entry for key, entry in json.load(f)["tables"].items() if entry["db"] not in specs}
+    for db_name, db_specs in specs.items():
+        for table_name, spec in db_specs.items():
+            tables[f"{db_name}:{table_name}"] = {
+                "db": db_name,
+                "table": table_name,
+                "columns": [name for name, _ in spec["columns"]],
+                "foreign_keys": [list(fk) for fk in spec["foreign_keys"]],
+            }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"tables": tables}, f)
+    os.replace(tmp_path, path)
+
+
+class SchemaCatalog:
+    """BM25 index over table and column names, and the foreign-key graph of each database.
+
+    A table's document is its name, counted twice, plus its column names.
+    Foreign keys are kept as undirected edges, since a join works either way.
+    """
+
+    def __init__(self, tables: dict, mtime: float = None):
+        self.tables = tables
+        self.mtime = mtime
+        self.ids = list(tables)
+        self._postings = {}
+        self._lengths = []
+        for i, entry in enumerate(tables.values()):
+            terms = Counter(tokenize(entry["table"]) * 2 + [t for col in entry["columns"] for t in tokenize(col)])
+            self._lengths.append(sum(terms.values()))
+            for term, count in terms.items():
+                self._postings.setdefault(term, []).append((i, count))
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        self.graph = {}
+        for entry in tables.values():
+            edges = self.graph.setdefault(entry["db"], {})
+            edges.setdefault(entry["table"], set())
+            for _, referred_table, _ in entry["foreign_keys"]:
+                if referred_table != entry["table"]:
+                    edges[entry["table"]].add(referred_table)
+                    edges.setdefault(referred_table, set()).add(entry["table"])
+
+    @classmethod
+    def load(cls, path: str = None):
+        path = path or SCHEMA_CATALOG_PATH
+        if not os.path.exists(path):
+            return cls({})
+        with open(path) as f:
+            return cls(json.load(f)["tables"], os.path.getmtime(path))
+
+    def bm25(self, question: str) -> dict:
+        """BM25 score of every table sharing a term with the question, keyed by "db:table" """
+        scores = Counter()
+        n = len(self.ids)
+        for term in set(tokenize(question)):
+            postings = self._postings.get(term, ())
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, count in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[i] / self._avg_length)
+                scores[self.ids[i]] += idf * count * (BM25_K1 + 1) / (count + norm)
+        return dict(scores)
+
+    def join_path(self, db_name: str, sources: set, target: str, max_hops: int = JOIN_MAX_HOPS) -> list:
+        """Shortest foreign-key path from any of ``sources`` to ``target``, as the tables on it"""
+        edges = self.graph.get(db_name, {})
+        previous = {source: None for source in sources}
+        queue = deque((source, 0) for source in sorted(sources))
+        while queue:
+            table, hops = queue.popleft()
+            if table == target:
+                path = []
+                while table is not None:
+                    path.append(table)
+                    table = previous[table]
+                return path[::-1]
+            if hops == max_hops:
+                continue
+            for neighbour in sorted(edges.get(table, ())):
+                if neighbour not in previous:
+                    previous[neighbour] = table
+                    queue.append((neighbour, hops + 1))
+        return []
+
+    def connect(self, db_name: str, tables: list, limit: int = JOIN_EXPAND_MAX) -> list:
+        """Tables to add so that ``tables`` (most relevant first) join up.
+
+        Grows a tree from the first table, attaching each next one by its
+        shortest path to the tree (the usual Steiner tree heuristic); tables
+        with no path within JOIN_MAX_HOPS are left unconnected.
+        """
+        tree = {tables[0]}
+        added = []
+        for table in tables[1:]:
+            if table in tree:
+                continue
+            path = self.join_path(db_name, tree, table)
+            between = [t for t in path[1:-1] if t not in tree]
+            if path and len(added) + len(between) <= limit:
+                added.extend(between)
+                tree.update(path)
+            else:
+                tree.add(table)
+        return added
+
+    def __len__(self):
+        return len(self.tables)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_schema_catalog() -> SchemaCatalog:
+    """The saved catalog, reloaded whenever the indexer rewrites the file"""
+    global _catalog
+    mtime = os.path.getmtime(SCHEMA_CATALOG_PATH) if os.path.exists(SCHEMA_CATALOG_PATH) else None
+    with _catalog_lock:
+        if _catalog is None or _catalog.mtime != mtime:
+            _catalog = SchemaCatalog.load()
+        return _catalog
+
+
+def candidate_count(top_k: int) -> int:
+    """How many vector matches to fetch for a final ``top_k``"""
+    return top_k * HYBRID_CANDIDATES if HYBRID_RETRIEVAL else top_k
+
+
+def _ranks(scores: dict) -> dict:
+    """1-based competition ranks, so tied scores (same table in every platform) share a rank"""
+    ranks = {}
+    ordered = sorted(scores.items(), key=lambda item: -item[1])
+    for i, (key, score) in enumerate(ordered):
+        ranks[key] = ranks[ordered[i - 1][0]] if i and score == ordered[i - 1][1] else i + 1
+    return ranks
+
+
+def hybrid_tables(question: str, vector_matches: list, top_k: int, get_metadata) -> list:
+    """Fuse vector matches with BM25 over names, then add the tables joining each database's picks.
+
+    Returns matches shaped like the table store's; ``metadata["via"]`` is
+    "search" for ranked tables and "join" for tables added to connect them.
+    ``get_metadata(ids)`` fetches metadata for tables only BM25 found.
+    Without a catalog (or with HYBRID_RETRIEVAL=0) the vector top_k is returned.
+    """
+    catalog = get_schema_catalog()
+    if not HYBRID_RETRIEVAL or not len(catalog):
+        return vector_matches[:top_k]
+
+    with span("lexical_search"):
+        lexical = catalog.bm25(question)
+    vector_ranks = _ranks({match["id"]: match["score"] for match in vector_matches})
+    lexical_ranks = _ranks(lexical)
+    fused = Counter()
+    for table_id, rank in vector_ranks.items():
+        fused[table_id] += HYBRID_VECTOR_WEIGHT / (HYBRID_RRF_K + rank)
+    for table_id, rank in lexical_ranks.items():
+        fused[table_id] += HYBRID_LEXICAL_WEIGHT / (HYBRID_RRF_K + rank)
+    ranked = [table_id for table_id, _ in fused.most_common(top_k)]
+
+    with span("fk_expand"):
+        picked = {}
+        for table_id in ranked:
+            if table_id in catalog.tables:
+                entry = catalog.tables[table_id]
+                picked.setdefault(entry["db"], []).append(entry["table"])
+        joined = [
+            f"{db_name}:{table}"
+            for db_name, tables in picked.items()
+            for table in catalog.connect(db_name, tables)
+        ]
+
+    metadata = {match["id"]: match["metadata"] for match in vector_matches}
+    missing = [table_id for table_id in ranked + joined if table_id not in metadata]
+    if missing:
+        metadata.update(get_metadata(missing))
+    matches = [
+        {"id": table_id, "score": fused[table_id], "metadata": {**metadata[table_id], "via": "search"}}
+        for table_id in ranked if table_id in metadata
+    ]
+    matches += [
+        {"id": table_id, "score": 0.0, "metadata": {**metadata[table_id], "via": "join"}}
+        for table_id in joined if table_id in metadata
+    ]
+    return matches
@@ -0,0 +1,8 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Clients are built at import; nothing in the tests calls the real services
+for key in ["OPENAI_API_KEY", "GEMINI_API_KEY", "GROQ_API_KEY"]:
+    os.environ.setdefault(key, "test")
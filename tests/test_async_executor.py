@@ -0,0 +1,21 @@
+import asyncio
+import pytest
+import async_executor
+
+
+def test_follower_timeout_leaves_leader_running():
+    async def leader():
+        await asyncio.sleep(0.1)
+        return {"sql": None}
+
+    async def scenario():
+        leader_task = asyncio.ensure_future(leader())
+        follower = async_executor._aanswer_with_shared_plan(
+            "zepto_db", "blinkit_db", leader_task, ["product"], "fp", "cheapest onions", "agent"
+        )
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(follower, timeout=0.01)
+        assert not leader_task.cancelled()
+        return await leader_task
+
+    assert asyncio.run(scenario()) == {"sql": None}
@@ -0,0 +1,41 @@
+import analysis
+from comparison import comparison_frame, result_frame
+
+
+def _response(db, columns, rows):
+    return {"db": db, "status": "ok", "output": str(rows), "columns": columns, "rows": rows}
+
+
+def test_repeated_columns_are_renamed():
+    frame = result_frame(_response("blinkit_db", ["name", "name", "price"], [("Onion", "Fresho", 30.0)]))
+    assert list(frame.columns) == ["name", "name_1", "price"]
+
+
+def test_comparison_frame_with_repeated_columns():
+    responses = [
+        _response("blinkit_db", ["name", "name", "price"], [("Onion", "Fresho", 30.0)]),
+        _response("zepto_db", ["name", "name", "price"], [("Onion", "Fresho", 28.0)]),
+    ]
+    frame = comparison_frame(responses)
+    assert frame["match_key"].tolist() == ["onion", "onion"]
+    assert frame["platform"].tolist() == ["zepto_db", "blinkit_db"]
+
+
+def test_fast_path_failure_falls_back(monkeypatch):
+    def broken(query, responses):
+        raise AttributeError("boom")
+    monkeypatch.setattr(analysis, "render_comparison", broken)
+    monkeypatch.setattr(analysis, "ANALYSIS_FAST_PATH", True)
+    responses = [_response("blinkit_db", ["name", "price"], [("Onion", 30.0)])]
+    assert analysis._local_analysis("cheapest onion", responses, ("no-such-key",)) is None
+
+
+def test_analysis_of_repeated_columns(monkeypatch):
+    monkeypatch.setattr(analysis, "ANALYSIS_FAST_PATH", True)
+    responses = [
+        _response("blinkit_db", ["name", "name", "price"], [("Onion", "Fresho", 30.0)]),
+        _response("zepto_db", ["name", "name", "price"], [("Onion", "Fresho", 28.0)]),
+    ]
+    rendered = analysis.analyze_with_groq("cheapest onion", responses)
+    assert "| name | name_1 | price |" in rendered
+    assert "**Cheapest:** Onion on Zepto Db" in rendered
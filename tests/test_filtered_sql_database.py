@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import create_engine, text
+from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+import bounded_sql
+from filtered_sql_database import FilteredSQLDatabase, capture_tool_results
+from result_cache import result_cache, table_versions
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'shop.sqlite3'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO item (id, name) VALUES (:id, :name)"),
+                     [{"id": i, "name": f"item {i}"} for i in range(1, 51)])
+    monkeypatch.setattr(bounded_sql, "SQL_MAX_ROWS", 5)
+    result_cache.invalidate()
+    table_versions.invalidate()
+    yield FilteredSQLDatabase(engine, "shop_db", ["item"])
+    engine.dispose()
+
+
+def test_run_no_throw_is_row_capped(db):
+    output = db.run_no_throw("SELECT id, name FROM item ORDER BY id")
+    assert output.startswith("[(1, 'item 1'), ")
+    assert "(5, 'item 5')]" in output
+    assert "(6, 'item 6')" not in output
+    assert "[truncated: showing 5 of 50 rows;" in output
+
+
+def test_run_no_throw_is_byte_capped(db, monkeypatch):
+    monkeypatch.setattr(bounded_sql, "SQL_MAX_BYTES", 30)
+    output = db.run_no_throw("SELECT id, name FROM item ORDER BY id")
+    assert "(2, 'item 2')" in output
+    assert "(3, 'item 3')" not in output
+    assert "[truncated: showing 2 of 50 rows;" in output
+
+
+def test_query_tool_is_bounded(db):
+    tool = QuerySQLDatabaseTool(db=db)
+    assert tool.name == "sql_db_query"
+    output = tool.invoke({"query": "SELECT id FROM item ORDER BY id"})
+    assert output.startswith("[(1,), (2,), (3,), (4,), (5,)]")
+    assert "[truncated: showing 5 of 50 rows;" in output
+
+
+def test_query_tool_reports_errors(db):
+    output = QuerySQLDatabaseTool(db=db).invoke({"query": "SELECT missing FROM item"})
+    assert output.startswith("Error:")
+
+
+def test_query_tool_reports_malformed_sql(db):
+    output = QuerySQLDatabaseTool(db=db).invoke({"query": "SELECT name FROM item WHERE name = 'abc"})
+    assert output.startswith("Error:")
+
+
+def test_parameters_use_the_plain_run(db):
+    output = db.run("SELECT name FROM item WHERE id = :id", parameters={"id": 7})
+    assert output == "[('item 7',)]"
+
+
+def test_tool_results_are_captured(db):
+    sql = "SELECT id, name FROM item ORDER BY id"
+    with capture_tool_results() as captured:
+        QuerySQLDatabaseTool(db=db).invoke({"query": sql})
+    assert captured[sql]["columns"] == ["id", "name"]
+    assert captured[sql]["rows"][0] == (1, "item 1")
+    assert captured[sql]["truncated"] and captured[sql]["total_rows"] == 50
+    db.run_no_throw(sql)
+    assert len(captured) == 1
@@ -0,0 +1,19 @@
+import time
+from concurrent.futures import Future
+import multi_db_executor
+
+
+def test_queued_job_reports_request_wait():
+    request_started = time.monotonic() - 2.0
+    result = multi_db_executor._build_result("zepto_db", Future(), {"zepto_db"}, {}, {}, request_started)
+    assert result["status"] == "timeout"
+    assert result["elapsed"] >= 2.0
+    assert result["output"].startswith("Error: still queued when the request deadline passed after 2.")
+
+
+def test_started_job_reports_its_own_time():
+    now = time.monotonic()
+    result = multi_db_executor._build_result(
+        "zepto_db", Future(), {"zepto_db"}, {"zepto_db": now - 1.0}, {"zepto_db": now}, now - 5.0
+    )
+    assert result["output"] == "Error: timed out after 1.0s"
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import create_engine, text
+from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+from filtered_sql_database import FilteredSQLDatabase
+from result_cache import cached_execute_bounded, parse_cacheable, result_cache, table_versions
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'shop.sqlite3'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text('CREATE TABLE "order" (id INTEGER PRIMARY KEY, item_id INTEGER)'))
+        conn.execute(text("INSERT INTO item (id, name) VALUES (1, 'tea'), (2, 'rice')"))
+    result_cache.invalidate()
+    table_versions.invalidate()
+    yield engine
+    engine.dispose()
+
+
+def test_repeated_tool_query_is_a_hit(engine):
+    tool = QuerySQLDatabaseTool(db=FilteredSQLDatabase(engine, "shop_db", ["item"]))
+    first = tool.invoke({"query": "SELECT name FROM item ORDER BY id"})
+    hits = result_cache.hits
+    second = tool.invoke({"query": "SELECT name  FROM item ORDER BY id"})
+    assert second == first == "[('tea',), ('rice',)]"
+    assert result_cache.hits == hits + 1
+
+
+def test_write_is_seen_once_versions_expire(engine):
+    sql = "SELECT COUNT(*) FROM item"
+    assert cached_execute_bounded(engine, "shop_db", sql)["rows"] == [(2,)]
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO item (id, name) VALUES (3, 'salt')"))
+    table_versions.invalidate()
+    result = cached_execute_bounded(engine, "shop_db", sql)
+    assert result["rows"] == [(3,)]
+    assert result["cache"] == "miss"
+
+
+def test_reserved_word_table_is_quoted(engine):
+    sql = 'SELECT COUNT(*) FROM "order"'
+    assert cached_execute_bounded(engine, "shop_db", sql)["cache"] == "miss"
+    assert cached_execute_bounded(engine, "shop_db", sql)["cache"] == "hit"
+
+
+def test_schema_qualified_tables_stay_distinct():
+    _, tables = parse_cacheable("SELECT * FROM sales.item JOIN item ON sales.item.id = item.id", "postgresql")
+    assert tables == ["item", "sales.item"]
+
+
+def test_unparseable_sql_is_not_cached():
+    assert parse_cacheable("SELECT name FROM item WHERE name = 'abc", "sqlite") is None
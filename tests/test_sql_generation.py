@@ -0,0 +1,39 @@
+import pytest
+from sql_generation import validate_sql
+
+TABLES = {"product": ["id", "name", "price"], "price": ["id", "product_id", "price"]}
+
+
+def test_select_passes():
+    validate_sql("SELECT p.name, p.price FROM product p WHERE p.price < 10", TABLES)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM product",
+    "SELECT p.* FROM product p",
+    "SELECT p.*, pr.price AS latest FROM product p JOIN price pr ON pr.product_id = p.id",
+])
+def test_star_passes(sql):
+    validate_sql(sql, TABLES)
+
+
+def test_cte_select_passes():
+    validate_sql("WITH cheap AS (SELECT id, name FROM product WHERE price < 10) SELECT name FROM cheap", TABLES)
+
+
+@pytest.mark.parametrize("sql", [
+    "WITH d AS (DELETE FROM product RETURNING *) SELECT * FROM d",
+    "WITH u AS (UPDATE product SET price = 0 RETURNING id) SELECT * FROM u",
+    "WITH i AS (INSERT INTO product (name) VALUES ('x') RETURNING id) SELECT * FROM i",
+    "SELECT * INTO product_copy FROM product",
+    "SELECT * FROM product FOR UPDATE",
+])
+def test_data_modifying_queries_rejected(sql):
+    with pytest.raises(ValueError, match="read-only"):
+        validate_sql(sql, TABLES)
+
+
+@pytest.mark.parametrize("sql", ["DELETE FROM product", "DROP TABLE product", "SELECT 1; DELETE FROM product"])
+def test_non_queries_rejected(sql):
+    with pytest.raises(ValueError):
+        validate_sql(sql, TABLES)
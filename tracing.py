@@ -0,0 +1,325 @@
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from langchain_core.callbacks import BaseCallbackHandler
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+# Span log, one JSON line per span. Off unless set: spans carry question text and SQL statements.
+# Written from a background thread and rotated at TRACE_LOG_MAX_BYTES, keeping TRACE_LOG_BACKUPS files.
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "")
+TRACE_LOG_MAX_BYTES = int(os.getenv("TRACE_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+TRACE_LOG_BACKUPS = int(os.getenv("TRACE_LOG_BACKUPS", "3"))
+# Set to an empty string to disable the metrics file
+METRICS_PATH = os.getenv("METRICS_PATH", os.path.join(_REPO_DIR, "metrics.prom"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# The trace and innermost span of the current question. Worker threads only
+# see them when submitted through copy_context().run; asyncio tasks and
+# asyncio.to_thread copy them automatically.
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Metrics:
+    """Process-wide counters, gauges and latency histograms in Prometheus text format"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name, tuple(sorted(labels.items())))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            key = self._key(name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def add_collector(self, collector):
+        """Call ``collector()`` before every render, to refresh gauges read from live objects"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def observe(self, name: str, seconds: float, **labels):
+        with self._lock:
+            key = self._key(name, labels)
+            if key not in self._histograms:
+                self._histograms[key] = {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+            histogram = self._histograms[key]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["count"] += 1
+            histogram["sum"] += seconds
+
+    @staticmethod
+    def _labels(labels, **extra) -> str:
+        items = list(labels) + list(extra.items())
+        return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}" if items else ""
+
+    def render(self) -> str:
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                lines.append(f"{name}{self._labels(labels)} {value}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                lines.append(f"{name}{self._labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                for bound, count in zip(self.buckets, histogram["buckets"]):
+                    lines.append(f"{name}_bucket{self._labels(labels, le=bound)} {count}")
+                lines.append(f"{name}_bucket{self._labels(labels, le='+Inf')} {histogram['count']}")
+                lines.append(f"{name}_count{self._labels(labels)} {histogram['count']}")
+                lines.append(f"{name}_sum{self._labels(labels)} {histogram['sum']:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str = None):
+        """Atomically replace the metrics file so scrapers never read a partial file"""
+        path = METRICS_PATH if path is None else path
+        if not path:
+            return
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+metrics = Metrics()
+
+_trace_logger = None
+_trace_logger_lock = threading.Lock()
+
+
+def _get_trace_logger() -> logging.Logger:
+    """Logger whose records are queued here and written to TRACE_LOG_PATH by one listener thread"""
+    global _trace_logger
+    with _trace_logger_lock:
+        if _trace_logger is None:
+            file_handler = RotatingFileHandler(TRACE_LOG_PATH, maxBytes=TRACE_LOG_MAX_BYTES,
+                                               backupCount=TRACE_LOG_BACKUPS, encoding="utf-8")
+            file_handler.setFormatter(logging.Formatter("%(message)s"))
+            records = queue.SimpleQueue()
+            listener = QueueListener(records, file_handler)
+            listener.start()
+            atexit.register(listener.stop)
+            logger = logging.getLogger("sql_agents.traces")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(QueueHandler(records))
+            _trace_logger = logger
+        return _trace_logger
+
+
+class Trace:
+    """All spans recorded while answering one question"""
+
+    def __init__(self, question: str):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.question = question
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: dict):
+        with self._lock:
+            self.spans.append(span)
+
+    def timings(self) -> list:
+        """Spans in start order, for display"""
+        with self._lock:
+            return sorted(self.spans, key=lambda span: span["start"])
+
+
+def _emit(span: dict):
+    trace = _current_trace.get()
+    if trace is not None:
+        span["trace_id"] = trace.trace_id
+        trace.add(span)
+    metrics.observe("sql_agents_stage_seconds", span["duration_ms"] / 1000, stage=span["name"])
+    if span["status"] != "ok":
+        metrics.inc("sql_agents_stage_errors_total", stage=span["name"])
+    if TRACE_LOG_PATH:
+        (_trace_logger or _get_trace_logger()).info(json.dumps(span, default=str))
+
+
+def record_span(name: str, start: float, duration_s: float, status: str = "ok",
+                parent_id: str = None, **attrs):
+    """Record a span that was timed elsewhere (callbacks, engine events)"""
+    parent = _current_span.get()
+    _emit({
+        "name": name,
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent_id or (parent["span_id"] if parent else None),
+        "start": start,
+        "duration_ms": round(duration_s * 1000, 3),
+        "status": status,
+        **attrs,
+    })
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block as a span nested under the current one.
+
+    The yielded dict can be updated inside the block to attach attributes
+    that are only known at the end (cache hit, row count, ...).
+    """
+    parent = _current_span.get()
+    current = {
+        "name": name,
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent["span_id"] if parent else None,
+        "start": time.time(),
+        "status": "ok",
+        **attrs,
+    }
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current["status"] = "error"
+        current["error"] = str(e)
+        raise
+    finally:
+        current["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        _current_span.reset(token)
+        _emit(current)
+
+
+@contextmanager
+def trace(question: str):
+    """Collect every span recorded while answering ``question``"""
+    current = Trace(question)
+    token = _current_trace.set(current)
+    try:
+        with span("question", question=question):
+            yield current
+    finally:
+        _current_trace.reset(token)
+        metrics.inc("sql_agents_questions_total")
+        metrics.write()
+
+
+class LLMTracingCallback(BaseCallbackHandler):
+    """Records one span per LLM call with its token usage"""
+
+    def __init__(self):
+        self._starts = {}
+
+    def _start(self, serialized, run_id, metadata):
+        model = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name", "llm")
+        self._starts[run_id] = (time.time(), time.perf_counter(), model)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(serialized, run_id, metadata)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start(serialized, run_id, metadata)
+
+    def _finish(self, run_id, status: str, **attrs):
+        start = self._starts.pop(run_id, None)
+        if start is None:
+            return
+        wall_start, started, model = start
+        record_span("llm_call", wall_start, time.perf_counter() - started, status=status,
+                    model=model, **attrs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        if not usage:
+            for generations in response.generations:
+                for generation in generations:
+                    message_usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += message_usage.get("input_tokens", 0)
+                    completion_tokens += message_usage.get("output_tokens", 0)
+        metrics.inc("sql_agents_llm_tokens_total", prompt_tokens, type="prompt")
+        metrics.inc("sql_agents_llm_tokens_total", completion_tokens, type="completion")
+        self._finish(run_id, "ok", prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "error", error=str(error))
+
+
+llm_callback = LLMTracingCallback()
+
+
+# Every SQL statement on any engine, sync or async, becomes a span
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("trace_query_start", []).append((time.time(), time.perf_counter()))
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    wall_start, started = conn.info["trace_query_start"].pop()
+    rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+    record_span("sql", wall_start, time.perf_counter() - started,
+                db=conn.engine.url.database, statement=" ".join(statement.split())[:500], rows=rows)
+    if rows is not None:
+        metrics.inc("sql_agents_sql_rows_total", rows)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    starts = context.connection.info.get("trace_query_start") if context.connection is not None else None
+    if starts:
+        wall_start, started = starts.pop()
+        record_span("sql", wall_start, time.perf_counter() - started, status="error",
+                    db=context.connection.engine.url.database,
+                    statement=" ".join((context.statement or "").split())[:500],
+                    error=str(context.original_exception))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = None):
+    """Serve /metrics on ``port`` (METRICS_PORT by default) from a daemon thread, once"""
+    global _metrics_server
+    port = port or METRICS_PORT
+    with _server_lock:
+        if _metrics_server is None and port:
+            _metrics_server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=_metrics_server.serve_forever, name="metrics", daemon=True).start()
+    return _metrics_server
@@ -0,0 +1,172 @@
+import os
+import json
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INDEX_NAME = "multi-db-index"
+EMBEDDING_DIM = 768
+LOCAL_INDEX_PATH = os.getenv(
+    "LOCAL_TABLE_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "table_index")
+)
+# "local" or "pinecone"; default to local when no Pinecone key is configured
+TABLE_STORE_BACKEND = os.getenv(
+    "TABLE_STORE_BACKEND",
+    "pinecone" if os.getenv("PINECONE_API_KEY") else "local"
+)
+
+
+class PineconeTableStore:
+    """Table-schema vectors stored in a Pinecone index"""
+
+    def __init__(self, index_name: str = INDEX_NAME, dimension: int = EMBEDDING_DIM,
+                 create_if_missing: bool = False):
+        from pinecone import Pinecone, ServerlessSpec
+
+        pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+        if create_if_missing:
+            if index_name not in [idx.name for idx in pc.list_indexes()]:
+                pc.create_index(
+                    name=index_name,
+                    dimension=dimension,
+                    metric="cosine",
+                    spec=ServerlessSpec(cloud="aws", region="us-east-1")
+                )
+                print(f"✅ Created index: {index_name}")
+            else:
+                print(f"✅ Index {index_name} exists")
+        self.index = pc.Index(index_name)
+
+    def upsert(self, vectors: list):
+        """Upsert (id, embedding, metadata) tuples"""
+        self.index.upsert(vectors=vectors)
+
+    def delete(self, ids: list):
+        if ids:
+            self.index.delete(ids=ids)
+
+    def get_all_metadata(self) -> dict:
+        """Metadata for every stored vector, keyed by id"""
+        ids = []
+        for page in self.index.list():
+            # Older clients yield lists of ids, newer ones ListResponse pages
+            ids.extend(v if isinstance(v, str) else v.id for v in getattr(page, "vectors", page))
+        return self.get_metadata(ids)
+
+    def get_metadata(self, ids: list) -> dict:
+        """Metadata for the given vector ids that exist, keyed by id"""
+        metadata = {}
+        for i in range(0, len(ids), 100):
+            fetched = self.index.fetch(ids=ids[i:i + 100]).vectors
+            metadata.update({vec_id: dict(vec.metadata or {}) for vec_id, vec in fetched.items()})
+        return metadata
+
+    def query(self, vector: list, top_k: int = 5):
+        matches = self.index.query(vector=vector, top_k=top_k, include_metadata=True)
+        return matches["matches"]
+
+
+class LocalTableStore:
+    """Table-schema vectors held in a NumPy matrix on local disk.
+
+    Vectors live in ``<path>.npy`` (L2-normalised float32 rows, memory-mapped
+    on load) and ids/metadata in ``<path>.json``. A query is a single
+    matrix-vector product, so cosine top-k over the ~60 table vectors takes
+    microseconds and needs no network.
+    """
+
+    def __init__(self, path: str = LOCAL_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.path + ".npy") and os.path.exists(self.path + ".json"):
+            self._matrix = np.load(self.path + ".npy", mmap_mode="r")
+            with open(self.path + ".json") as f:
+                records = json.load(f)
+            self._ids = [r["id"] for r in records]
+            self._metadata = [r["metadata"] for r in records]
+        else:
+            self._matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+            self._ids, self._metadata = [], []
+
+    def _save(self, matrix: np.ndarray, ids: list, metadata: list):
+        # Write to temp files and swap in, so readers never see a partial index
+        with open(self.path + ".tmp.npy", "wb") as f:
+            np.save(f, matrix)
+        with open(self.path + ".tmp.json", "w") as f:
+            json.dump([{"id": i, "metadata": m} for i, m in zip(ids, metadata)], f)
+        os.replace(self.path + ".tmp.npy", self.path + ".npy")
+        os.replace(self.path + ".tmp.json", self.path + ".json")
+        self._load()
+
+    def upsert(self, vectors: list):
+        """Upsert (id, embedding, metadata) tuples"""
+        with self._lock:
+            positions = {vec_id: i for i, vec_id in enumerate(self._ids)}
+            ids, metadata = list(self._ids), list(self._metadata)
+            matrix = np.array(self._matrix, dtype=np.float32)
+            new_rows = []
+            for vec_id, values, meta in vectors:
+                vec = np.asarray(values, dtype=np.float32)
+                vec = vec / (np.linalg.norm(vec) or 1.0)
+                if vec_id in positions:
+                    matrix[positions[vec_id]] = vec
+                    metadata[positions[vec_id]] = meta
+                else:
+                    positions[vec_id] = len(ids)
+                    ids.append(vec_id)
+                    metadata.append(meta)
+                    new_rows.append(vec)
+            if new_rows:
+                matrix = np.vstack([matrix] + new_rows)
+            self._save(matrix, ids, metadata)
+
+    def delete(self, ids: list):
+        with self._lock:
+            drop = set(ids)
+            keep = [i for i, vec_id in enumerate(self._ids) if vec_id not in drop]
+            if len(keep) == len(self._ids):
+                return
+            self._save(
+                np.array(self._matrix[keep], dtype=np.float32).reshape(len(keep), -1),
+                [self._ids[i] for i in keep],
+                [self._metadata[i] for i in keep]
+            )
+
+    def get_all_metadata(self) -> dict:
+        """Metadata for every stored vector, keyed by id"""
+        return dict(zip(self._ids, self._metadata))
+
+    def get_metadata(self, ids: list) -> dict:
+        """Metadata for the given vector ids that exist, keyed by id"""
+        wanted = set(ids)
+        return {vec_id: meta for vec_id, meta in zip(self._ids, self._metadata) if vec_id in wanted}
+
+    def query(self, vector: list, top_k: int = 5):
+        matrix, ids, metadata = self._matrix, self._ids, self._metadata
+        if not ids:
+            return []
+        q = np.asarray(vector, dtype=np.float32)
+        scores = matrix @ (q / (np.linalg.norm(q) or 1.0))
+        top_k = min(top_k, len(ids))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"id": ids[i], "score": float(scores[i]), "metadata": metadata[i]}
+            for i in top
+        ]
+
+
+def get_table_store(backend: str = None, **kwargs):
+    """Create the table-retrieval store for the configured backend"""
+    backend = backend or TABLE_STORE_BACKEND
+    if backend == "local":
+        return LocalTableStore(**kwargs)
+    if backend == "pinecone":
+        return PineconeTableStore(**kwargs)
+    raise ValueError(f"Unknown table store backend: {backend}")